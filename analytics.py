@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+from storage import AppendLog
+
+EVENTS_FILE = "events.jsonl"
+DAILY_FILE = "events_daily.json"
+
+# сырые события старше этого срока сворачиваются в дневные сводки
+RETENTION_DAYS = 7
+
+# воронка: (подпись, шаг); шаг — состояние FSM, "cb:<префикс>" или "goal:<цель>"
+FUNNELS = {
+    "Кружки": [
+        ("Открыли раздел", "cb:clubs"),
+        ("Указали возраст", "ClubForm:address"),
+        # два пути: подразделение → направление или сразу геолокация
+        ("Выбрали подразделение / геолокацию", "goal:club_place"),
+        ("Получили список кружков", "goal:club_list"),
+        ("Открыли карточку", "cb:club"),
+    ],
+    "Пакетные туры": [
+        ("Открыли раздел", "cb:packages"),
+        ("Указали группу", "PackageForm:activities"),
+        ("Выбрали активности", "PackageForm:name"),
+        ("Указали имя", "PackageForm:phone"),
+        ("Отправили заявку", "goal:package"),
+    ],
+    "Запись на МК": [
+        ("Открыли карточку", "cb:master"),
+        ("Нажали «Записаться»", "cb:enroll"),
+        ("Указали имя", "MasterForm:enroll_phone"),
+        ("Отправили заявку", "goal:enroll"),
+    ],
+}
+
+
+def day_of(ts):
+    return date.fromtimestamp(ts).isoformat()
+
+
+def event_steps(event):
+    steps = []
+    if event.get("to") and event["to"] != event.get("from"):
+        steps.append(event["to"])
+    if event["type"] == "callback" and event.get("data"):
+        steps.append("cb:" + event["data"].split("_")[0])
+    if event["type"] == "goal":
+        steps.append("goal:" + event["name"])
+    return steps
+
+
+# ================= AGGREGATES =================
+
+class Analytics:
+    def __init__(self, path=EVENTS_FILE, daily_path=DAILY_FILE):
+        self.log = AppendLog(path)
+        self.daily_path = daily_path
+
+        # итоги за всё время: обновляются на каждом событии, читаются за O(1)
+        self.step_totals = Counter()
+        self.choices = {"direction": Counter(), "activity": Counter()}
+
+        # дни, ещё лежащие в сыром журнале: уникальные пользователи по шагам
+        self.days = {}
+        # дни, уже свёрнутые в сводки
+        self.summaries = {}
+
+    # ---------- Загрузка ----------
+
+    def load(self):
+        if os.path.exists(self.daily_path):
+            with open(self.daily_path, "r", encoding="utf-8") as f:
+                self.summaries = json.load(f)
+
+        for summary in self.summaries.values():
+            self.step_totals.update(summary["steps"])
+            for kind, counts in summary["choices"].items():
+                self.choices.setdefault(kind, Counter()).update(counts)
+
+        for event in self.log.read():
+            # сводка уже записана, но журнал не успели переписать
+            if day_of(event["ts"]) in self.summaries:
+                continue
+            self._apply(event)
+
+    # ---------- Запись ----------
+
+    def record(self, event):
+        event.setdefault("ts", int(time.time()))
+        self.log.append(event)
+        self._apply(event)
+
+    def track_choice(self, user_id, kind, value):
+        self.record({"type": "choice", "uid": user_id, "kind": kind, "value": value})
+
+    def track_goal(self, user_id, name):
+        self.record({"type": "goal", "uid": user_id, "name": name})
+
+    def _apply(self, event):
+        day = self.days.get(day_of(event["ts"]))
+        if day is None:
+            day = self.days[day_of(event["ts"])] = {
+                "users": set(),
+                "steps": {},
+                "choices": {},
+            }
+
+        day["users"].add(event["uid"])
+
+        for step in event_steps(event):
+            users = day["steps"].setdefault(step, set())
+            if event["uid"] not in users:
+                users.add(event["uid"])
+                self.step_totals[step] += 1
+
+        if event["type"] == "choice":
+            kind, value = event["kind"], event["value"]
+            self.choices.setdefault(kind, Counter())[value] += 1
+            day["choices"].setdefault(kind, Counter())[value] += 1
+
+    # ---------- Чтение ----------
+
+    def daily_uniques(self, day=None):
+        day = day or date.today().isoformat()
+        if day in self.days:
+            return len(self.days[day]["users"])
+        if day in self.summaries:
+            return self.summaries[day]["uniques"]
+        return 0
+
+    def funnel(self, name):
+        rows = []
+        first = None
+        for label, step in FUNNELS[name]:
+            count = self.step_totals[step]
+            if first is None:
+                first = count
+            rows.append((label, count, count / first if first else 0.0))
+        return rows
+
+    def top(self, kind, limit=5):
+        return self.choices.get(kind, Counter()).most_common(limit)
+
+    # ---------- Фоновые задачи ----------
+
+    async def compact(self, today=None):
+        today = today or date.today()
+        cutoff = (today - timedelta(days=RETENTION_DAYS)).isoformat()
+        old_days = [d for d in self.days if d < cutoff]
+        if not old_days:
+            return
+
+        # сначала сбрасываем буфер, чтобы старые события не остались в памяти
+        await self.log.flush()
+
+        for d in old_days:
+            day = self.days.pop(d)
+            self.summaries[d] = {
+                "uniques": len(day["users"]),
+                "steps": {step: len(users) for step, users in day["steps"].items()},
+                "choices": {kind: dict(c) for kind, c in day["choices"].items()},
+            }
+
+        await asyncio.to_thread(self._save_summaries)
+        await self.log.rewrite(lambda event: day_of(event["ts"]) >= cutoff)
+
+    def _save_summaries(self):
+        tmp = f"{self.daily_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.summaries, f, ensure_ascii=False)
+        os.replace(tmp, self.daily_path)
+
+    async def run(self, compact_interval=3600):
+        flusher = asyncio.create_task(self.log.run())
+        try:
+            while True:
+                await self.compact()
+                await asyncio.sleep(compact_interval)
+        finally:
+            flusher.cancel()
+            await self.log.flush()
+
+
+# ================= MIDDLEWARE =================
+
+class AnalyticsMiddleware(BaseMiddleware):
+    # Пишет каждое сообщение / нажатие вместе с переходом FSM до и после хендлера
+
+    def __init__(self, analytics):
+        self.analytics = analytics
+
+    async def __call__(self, handler, event, data):
+        if event.from_user is None:
+            return await handler(event, data)
+
+        before = data.get("raw_state")
+        try:
+            return await handler(event, data)
+        finally:
+            state = data.get("state")
+            after = await state.get_state() if state else None
+            self.analytics.record({
+                "type": "callback" if isinstance(event, CallbackQuery) else "message",
+                "uid": event.from_user.id,
+                "data": event.data if isinstance(event, CallbackQuery) else None,
+                "from": before,
+                "to": after,
+            })
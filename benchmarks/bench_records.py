@@ -0,0 +1,99 @@
+# Память на одну запись: словари (как раньше) против __slots__ с интернированием.
+#
+#     python benchmarks/bench_records.py [10000 100000 1000000]
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Club  # noqa: E402
+from repository import Masterclass  # noqa: E402
+from subscribers import Subscriber  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+DIRECTIONS = ["Робототехника", "Фитнес-аэробика", "Цирковое искусство", "Керамика", "Шахматы"]
+TEACHERS = [f"Педагог Иванова {i}" for i in range(200)]
+ADDRESSES = [f"город Москва, улица Газопровод, дом {i}" for i in range(20)]
+AGES = ["5-7", "6-12", "7-10 лет", "12+", "4-15"]
+BRANCHES = ["Главное здание", "МХС Аннино", "СП Юный техник", "СП Щербинка"]
+
+
+def fresh(text):
+    # openpyxl и json.load создают новую строку на каждую ячейку
+    return json.loads(json.dumps(text))
+
+
+def club_row(i):
+    return (
+        fresh(random.choice(DIRECTIONS)), f"Кружок {i}", fresh(random.choice(AGES)),
+        fresh(random.choice(ADDRESSES)), fresh(random.choice(TEACHERS)), f"https://example.ru/c/{i}",
+    )
+
+
+def club_dict(i):
+    direction, name, age, address, teacher, link = club_row(i)
+    return {
+        "direction": direction, "name": name, "age": age, "address": address,
+        "teacher": teacher, "link": link,
+        "min_age": 6, "max_age": 12, "branch": fresh(random.choice(BRANCHES)), "lat": 55.6, "lon": 37.6,
+    }
+
+
+def club_slots(i):
+    club = Club(*club_row(i))
+    club.min_age, club.max_age = 6, 12
+    club.branch, club.lat, club.lon = sys.intern(fresh(random.choice(BRANCHES))), 55.6, 37.6
+    return club
+
+
+def master_data(i):
+    return {
+        "id": f"{i:08x}", "title": f"Мастер-класс {i}", "description": fresh("Описание мастер-класса"),
+        "date": fresh("12.05 18:00"), "price": fresh("1500"), "teacher": fresh(random.choice(TEACHERS)),
+        "capacity": 12, "link": f"https://example.ru/m/{i}", "media": [],
+    }
+
+
+def subscriber_data(i):
+    return {
+        "id": 100_000_000 + i, "age": random.randint(4, 16),
+        "branches": [fresh(random.choice(BRANCHES))],
+        "interests": sorted({fresh(random.choice(DIRECTIONS)) for _ in range(2)}),
+    }
+
+
+CASES = [
+    ("Кружки", club_dict, club_slots),
+    ("Мастер-классы", master_data, lambda i: Masterclass.from_dict(master_data(i))),
+    ("Подписчики", subscriber_data, lambda i: Subscriber.from_dict(subscriber_data(i))),
+]
+
+
+def measure(factory, n):
+    random.seed(n)
+    gc.collect()
+    tracemalloc.start()
+    records = [factory(i) for i in range(n)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current / n
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or SIZES
+    print(f"{'записи':<15}{'N':>10}{'dict, Б':>12}{'slots, Б':>12}{'экономия':>10}")
+    for title, before, after in CASES:
+        for n in sizes:
+            old = measure(before, n)
+            new = measure(after, n)
+            print(f"{title:<15}{n:>10}{old:>12.0f}{new:>12.0f}{1 - new / old:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import os
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+CHECKPOINT_FILE = "broadcast_checkpoint.json"
+# как часто сохранять прогресс на случай аварийного завершения
+CHECKPOINT_EVERY = 100
+SEND_DELAY = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastJob:
+    kind = "broadcast"
+
+    def __init__(self, admin_chat, text, items, audience, sent=0, success=0, removed=0):
+        self.admin_chat = admin_chat
+        self.text = text
+        self.items = items
+        self.audience = audience
+        self.sent = sent
+        self.success = success
+        self.removed = removed
+        self.stopping = False
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "admin_chat": self.admin_chat,
+            "text": self.text,
+            "items": self.items,
+            "audience": self.audience[self.sent:],
+            "success": self.success,
+            "removed": self.removed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["admin_chat"], data["text"], data["items"], data["audience"],
+            success=data["success"], removed=data["removed"]
+        )
+
+    def stop(self):
+        self.stopping = True
+
+    async def send(self, bot, media, index, reply_markup):
+        await media.send_content(bot, self.audience[index], self.text, self.items, reply_markup=reply_markup)
+
+    async def run(self, bot, media, subscribers, reply_markup=None):
+        # -> True, если рассылка дошла до конца; False — остановлена с чекпоинтом
+        markup = reply_markup if len(self.items) <= 1 else None
+
+        while self.sent < len(self.audience):
+            if self.stopping:
+                await save_checkpoint(self)
+                return False
+
+            user_id = self.audience[self.sent]
+            try:
+                await self.send(bot, media, self.sent, markup)
+                self.success += 1
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except TelegramForbiddenError:
+                subscribers.remove(user_id)
+                self.removed += 1
+            except Exception as e:
+                logger.warning("Рассылка: не доставлено %s: %s", user_id, e)
+
+            self.sent += 1
+            if self.sent % CHECKPOINT_EVERY == 0:
+                await save_checkpoint(self)
+            await asyncio.sleep(SEND_DELAY)
+
+        await clear_checkpoint(self)
+        return True
+
+
+class NewsJob(BroadcastJob):
+    # Персональные уведомления (новости каталога): у каждого получателя
+    # свой текст. Идут отдельно от очереди Outbox, чтобы не задерживать
+    # ответы поддержки, и переживают перезапуск через тот же чекпоинт.
+    kind = "news"
+
+    def __init__(self, audience, texts, sent=0, success=0, removed=0):
+        super().__init__(None, None, [], audience, sent, success, removed)
+        self.texts = texts
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "audience": self.audience[self.sent:],
+            "texts": self.texts[self.sent:],
+            "success": self.success,
+            "removed": self.removed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["audience"], data["texts"], success=data["success"], removed=data["removed"])
+
+    async def send(self, bot, media, index, reply_markup):
+        await bot.send_message(
+            self.audience[index], self.texts[index],
+            reply_markup=reply_markup, disable_web_page_preview=True
+        )
+
+
+JOB_KINDS = {job.kind: job for job in (BroadcastJob, NewsJob)}
+
+
+# ================= CHECKPOINT =================
+
+# все незавершённые рассылки хранятся в одном файле
+_pending = {}
+_lock = asyncio.Lock()
+
+
+def load_checkpoints(path=CHECKPOINT_FILE):
+    # продолженные рассылки сразу попадают в _pending: иначе первая
+    # завершившаяся перезаписала бы файл без чекпоинтов остальных
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        jobs = [JOB_KINDS[d.get("kind", "broadcast")].from_dict(d) for d in json.load(f)]
+    for job in jobs:
+        _pending[id(job)] = job.to_dict()
+    return jobs
+
+
+async def save_checkpoints(path=CHECKPOINT_FILE):
+    data = list(_pending.values())
+
+    def write():
+        if not data:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    async with _lock:
+        await asyncio.to_thread(write)
+
+
+async def save_checkpoint(job):
+    _pending[id(job)] = job.to_dict()
+    await save_checkpoints()
+
+
+async def clear_checkpoint(job):
+    _pending.pop(id(job), None)
+    await save_checkpoints()
@@ -0,0 +1,225 @@
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+from collections import Counter
+
+from geo import KDTree
+from ingest import club_key, ingest, normalize_address, sources_digest
+from tables import MAX_AGE, intern_text
+
+CLUBS_FILE = "joined_clubs.xlsx"
+# таблицы подразделений (xlsx/csv); если папки нет — один CLUBS_FILE
+SOURCES_DIR = "club_sources"
+# таблица координат ведётся рядом с xlsx: branch,address,lat,lon
+COORDS_FILE = "club_coordinates.csv"
+# хэши строк прошлой версии каталога — для диффа при замене xlsx
+STATE_FILE = "catalog_state.json"
+# меняется вместе с ключами или нормализацией строк — старое состояние не сравнивается
+STATE_VERSION = 3
+
+ROW_FIELDS = ("direction", "name", "age", "address", "teacher", "link")
+
+logger = logging.getLogger(__name__)
+
+
+class Club:
+    # Кружков — тысячи строк, а направления, адреса, педагоги и возрасты
+    # повторяются: __slots__ вместо dict и интернированные строки.
+
+    __slots__ = ROW_FIELDS + ("min_age", "max_age", "branch", "lat", "lon")
+
+    def __init__(self, direction, name, age, address, teacher, link):
+        self.direction = intern_text(direction)
+        self.name = name
+        self.age = intern_text(age)
+        self.address = intern_text(address)
+        self.teacher = intern_text(teacher)
+        self.link = link
+        self.min_age = self.max_age = None
+        self.branch = self.lat = self.lon = None
+
+
+def find_sources(directory=SOURCES_DIR):
+    paths = sorted(
+        path for pattern in ("*.xlsx", "*.csv")
+        for path in glob.glob(os.path.join(directory, pattern))
+    )
+    return paths or [CLUBS_FILE]
+
+
+def row_hash(club):
+    raw = json.dumps([getattr(club, field) for field in ROW_FIELDS], ensure_ascii=False, default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def row_keys(clubs):
+    # кружок узнаётся по названию и адресу; смена педагога — это изменение
+    # строки (row_hash), а не новый кружок. Совпадения нумеруются
+    seen = Counter()
+    keys = []
+    for club in clubs:
+        key = club_key(club.name, club.address)
+        seen[key] += 1
+        keys.append(f"{key}#{seen[key]}")
+    return keys
+
+
+def load_coordinates(path=COORDS_FILE):
+    # -> {нормализованный адрес: (подразделение, lat, lon)}; пустой адрес — онлайн
+    places = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            lat = float(row["lat"]) if row["lat"] else None
+            lon = float(row["lon"]) if row["lon"] else None
+            places[normalize_address(row["address"])] = (intern_text(row["branch"]), lat, lon)
+    return places
+
+
+# ================= CATALOG =================
+
+class Catalog:
+    # Каталог кружков. reload() можно вызывать из потока: новое состояние
+    # собирается целиком и подменяется одним присваиванием.
+    # Источников несколько (по таблице на подразделение), см. ingest.py.
+    # Неизменённые файлы отсекаются по stat(), затем по хэшу содержимого;
+    # изменённые сравниваются построчно по хэшам строк прошлой версии.
+
+    def __init__(self, sources=None, coords_path=COORDS_FILE, state_path=STATE_FILE):
+        self.sources = sources
+        self.coords_path = coords_path
+        self.state_path = state_path
+        self.branches = []
+        # (кружки, k-d дерево по координатам, {(подразделение | None, возраст): кружки})
+        self.data = ([], KDTree([]), {})
+        self.report = None
+
+        self.stamp = None
+        self.digest = None
+        self.hashes = {}
+
+    @property
+    def clubs(self):
+        return self.data[0]
+
+    def load(self):
+        # прошлая версия — из файла состояния; при первом запуске дифф пустой
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION:
+                self.digest, self.hashes = state["digest"], state["rows"]
+        try:
+            return self.reload(force=True)
+        except ValueError as e:
+            # каталог пока пуст; stamp не сдвинут — фоновая проверка повторит
+            logger.warning("Каталог не загружен: %s", e)
+            return None
+
+    def save_state(self):
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": STATE_VERSION, "digest": self.digest, "rows": self.hashes},
+                f, ensure_ascii=False
+            )
+        os.replace(tmp, self.state_path)
+
+    def paths(self):
+        return self.sources or find_sources()
+
+    def _stat(self):
+        # добавленный или удалённый источник тоже меняет отпечаток
+        stamp = []
+        for path in self.paths():
+            st = os.stat(path)
+            stamp.append((path, st.st_size, st.st_mtime_ns))
+        return tuple(stamp)
+
+    def modified(self):
+        return self._stat() != self.stamp
+
+    def reload(self, force=False):
+        # -> {"added", "changed", "removed", "report"} или None, если источники не изменились.
+        # ValueError — какой-то источник не прочитан: текущий каталог и
+        # состояние не трогаем, stamp не сдвигаем, чтобы повторить позже
+        stamp = self._stat()
+        if stamp == self.stamp:
+            return None
+
+        paths = [path for path, _, _ in stamp]
+        digest = sources_digest(paths)
+        if digest == self.digest and not force:
+            self.stamp = stamp
+            return None
+
+        rows, report = ingest(paths)
+        if report["failed"]:
+            raise ValueError("не прочитаны источники: " + ", ".join(report["failed"]))
+
+        self.stamp, self.report = stamp, report
+        clubs = self._build(rows)
+        hashes = {}
+        diff = {"added": [], "changed": [], "removed": [], "report": self.report}
+        for key, club in zip(row_keys(clubs), clubs):
+            hashes[key] = row_hash(club)
+            previous = self.hashes.get(key)
+            if previous is None:
+                diff["added"].append(club)
+            elif previous != hashes[key]:
+                diff["changed"].append(club)
+        diff["removed"] = [key for key in self.hashes if key not in hashes]
+
+        # первый запуск без сохранённого состояния — это не «новые кружки»
+        if not self.hashes:
+            diff["added"] = []
+
+        self.digest, self.hashes = digest, hashes
+        self.save_state()
+        return diff
+
+    def _build(self, rows):
+        places = load_coordinates(self.coords_path) if os.path.exists(self.coords_path) else {}
+        self.branches = list(dict.fromkeys(branch for branch, _, _ in places.values()))
+
+        clubs = []
+        points = []
+        by_age = {}
+        for row in rows:
+            club = Club(*row[:6])
+            club.min_age, club.max_age = row[6], row[7]
+
+            place = places.get(normalize_address(club.address))
+            if place is None:
+                logger.warning("Адрес не найден в %s: %s", self.coords_path, club.address)
+            else:
+                club.branch, club.lat, club.lon = place
+
+            if club.lat is not None:
+                points.append((club.lat, club.lon, len(clubs)))
+            if club.min_age is not None:
+                for year in range(max(club.min_age, 0), min(club.max_age, MAX_AGE) + 1):
+                    by_age.setdefault((None, year), []).append(club)
+                    by_age.setdefault((club.branch, year), []).append(club)
+            clubs.append(club)
+
+        self.data = (clubs, KDTree(points), by_age)
+        return clubs
+
+    def for_age(self, age, branch=None):
+        return list(self.data[2].get((branch, age), ()))
+
+    def nearest(self, lat, lon, age, limit=10):
+        # -> [(distance_km, club)]
+        clubs, tree, _ = self.data
+
+        def fits(index):
+            club = clubs[index]
+            return club.min_age is not None and club.min_age <= age <= club.max_age
+
+        return [
+            (distance, clubs[index])
+            for distance, index in tree.nearest(lat, lon, limit, accept=fits)
+        ]
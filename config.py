@@ -2,3 +2,14 @@ import os
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 ADMIN_ID = int(os.getenv("ADMIN_ID"))
+# операторы поддержки: ADMIN_IDS=1,2,3; по умолчанию только ADMIN_ID
+ADMIN_IDS = tuple(
+    int(a) for a in os.getenv("ADMIN_IDS", "").split(",") if a.strip()
+) or (ADMIN_ID,)
+
+# разделы бота, которые нужно подключить: BOT_SECTIONS=clubs,masterclasses
+ALL_SECTIONS = ("clubs", "masterclasses", "packages", "support", "admin")
+SECTIONS = tuple(
+    s.strip() for s in (os.getenv("BOT_SECTIONS") or ",".join(ALL_SECTIONS)).split(",")
+    if s.strip() in ALL_SECTIONS
+)
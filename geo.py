@@ -0,0 +1,79 @@
+import heapq
+import math
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# ================= K-D TREE =================
+
+class KDTree:
+    # 2-d дерево по точкам (lat, lon, item). Координаты проецируются
+    # на плоскость в километрах — для масштаба города этого достаточно.
+
+    def __init__(self, points):
+        self.origin_lat = (
+            sum(p[0] for p in points) / len(points) if points else 0.0
+        )
+        self.lon_scale = 111.32 * math.cos(math.radians(self.origin_lat))
+        nodes = [(*self._project(lat, lon), lat, lon, item) for lat, lon, item in points]
+        self.root = self._build(nodes, 0)
+
+    def _project(self, lat, lon):
+        return lon * self.lon_scale, lat * 110.57
+
+    def _build(self, nodes, depth):
+        if not nodes:
+            return None
+        axis = depth % 2
+        nodes.sort(key=lambda n: n[axis])
+        mid = len(nodes) // 2
+        return (
+            nodes[mid],
+            axis,
+            self._build(nodes[:mid], depth + 1),
+            self._build(nodes[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, lat, lon, k=10, accept=None):
+        # -> [(distance_km, item)] по возрастанию расстояния;
+        # accept(item) отбрасывает точки прямо во время обхода
+        target = self._project(lat, lon)
+        heap = []  # (-dist², counter, node) — максимум на вершине
+        counter = 0
+
+        def visit(tree):
+            nonlocal counter
+            if tree is None:
+                return
+            node, axis, left, right = tree
+
+            if accept is None or accept(node[4]):
+                dist = (node[0] - target[0]) ** 2 + (node[1] - target[1]) ** 2
+                counter += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, (-dist, counter, node))
+                elif dist < -heap[0][0]:
+                    heapq.heapreplace(heap, (-dist, counter, node))
+
+            diff = target[axis] - node[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(self.root)
+
+        found = sorted(heap, key=lambda h: (-h[0], h[1]))
+        return [
+            (haversine_km(lat, lon, node[2], node[3]), node[4])
+            for _, _, node in found
+        ]
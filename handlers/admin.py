@@ -1,29 +1,371 @@
-from aiogram import types
-from aiogram.dispatcher import FSMContext
-from aiogram.types import ParseMode
-from aiogram.dispatcher.filters import Command
-from aiogram.dispatcher.filters.state import State, StatesGroup
-from aiogram import Router
+import asyncio
+import html
+import os
+import tempfile
+
+from aiogram import Dispatcher, F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import (
+    BufferedInputFile,
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message
+)
+
+from analytics import FUNNELS
+from broadcast import BroadcastJob
 from config import ADMIN_ID
-from keyboards import bottom_kb
+from media import MEDIA_DIR, message_media
+from services import Services
+from states import BroadcastForm, ImportForm, MasterForm
+from subscribers import describe_segment, parse_segment
+
+router = Router(name=__name__)
+
+PROFILE_MAX_SECONDS = 300
+
+# ================= MASTERCLASSES =================
+
+@router.callback_query(F.data == "admin")
+async def admin_panel(callback: CallbackQuery):
+    if callback.from_user.id != ADMIN_ID:
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    await callback.message.answer(
+        "Админ панель — Мастер-классы:",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="➕ Добавить МК", callback_data="add_master")],
+            [InlineKeyboardButton(text="📥 Импорт из файла", callback_data="import_masters")],
+            [InlineKeyboardButton(text="❌ Удалить МК", callback_data="delete_master")],
+            [InlineKeyboardButton(text="⬅ В меню", callback_data="menu")]
+        ])
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "add_master")
+async def master_add_start(callback: CallbackQuery, state: FSMContext):
+    await state.set_state(MasterForm.title)
+    await callback.message.answer("Введите название мастер-класса:")
+    await callback.answer()
+
+
+@router.message(MasterForm.title)
+async def master_title(message: Message, state: FSMContext):
+    await state.update_data(title=message.text)
+    await state.set_state(MasterForm.description)
+    await message.answer("Введите описание:")
+
+
+@router.message(MasterForm.description)
+async def master_description(message: Message, state: FSMContext):
+    await state.update_data(description=message.text)
+    await state.set_state(MasterForm.date)
+    await message.answer("Введите дату и время:")
+
+
+@router.message(MasterForm.date)
+async def master_date(message: Message, state: FSMContext):
+    await state.update_data(date=message.text)
+    await state.set_state(MasterForm.price)
+    await message.answer("Введите стоимость:")
+
+
+@router.message(MasterForm.price)
+async def master_price(message: Message, state: FSMContext):
+    await state.update_data(price=message.text)
+    await state.set_state(MasterForm.teacher)
+    await message.answer("Введите педагога:")
+
+
+@router.message(MasterForm.teacher)
+async def master_teacher(message: Message, state: FSMContext):
+    await state.update_data(teacher=message.text)
+    await state.set_state(MasterForm.capacity)
+    await message.answer("Введите количество мест (0 — без ограничений):")
+
+
+@router.message(MasterForm.capacity)
+async def master_capacity(message: Message, state: FSMContext):
+    if not message.text or not message.text.isdigit():
+        await message.answer("Введите количество мест числом.")
+        return
 
-router = Router()
+    await state.update_data(capacity=int(message.text))
+    await state.set_state(MasterForm.link)
+    await message.answer("Введите ссылку на подробное описание:")
 
-# Состояния для админки
-class AdminForm(StatesGroup):
-    action = State()
 
-@router.message(Command("admin"))
-async def admin_menu(message: types.Message):
-    if message.from_user.id == ADMIN_ID:
-        await message.answer("Вы в админ панели. Что хотите сделать?", reply_markup=bottom_kb())
+@router.message(MasterForm.link)
+async def master_link(message: Message, state: FSMContext):
+    await state.update_data(link=message.text, media=[])
+    await state.set_state(MasterForm.media)
+    await message.answer(
+        "Отправьте постер (фото) и другие материалы: фото, видео, документы.\n"
+        "Первое фото станет постером.",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="Без материалов", callback_data="mc_media_done")]
+        ])
+    )
+
+
+@router.message(MasterForm.media)
+async def master_media(message: Message, state: FSMContext):
+    item = message_media(message)
+    if item is None:
+        await message.answer("Отправьте фото, видео или документ.")
+        return
+
+    data = await state.get_data()
+    attachments = data["media"]
+    # постер всегда первым
+    if item["kind"] == "photo" and not any(a["kind"] == "photo" for a in attachments):
+        attachments.insert(0, item)
     else:
-        await message.answer("Вы не администратор!")
+        attachments.append(item)
+    await state.update_data(media=attachments)
+
+    await message.answer(
+        f"Добавлено материалов: {len(attachments)}",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Готово", callback_data="mc_media_done")]
+        ])
+    )
+
+
+@router.callback_query(MasterForm.media, F.data == "mc_media_done")
+async def master_save(callback: CallbackQuery, state: FSMContext, services: Services):
+    data = await state.get_data()
+    services.masters.add(data)
+    services.seats.sync(services.masters.all())
+
+    await callback.message.answer("Мастер-класс добавлен ✅")
+    await state.clear()
+    await callback.answer()
+
+
+@router.callback_query(F.data == "import_masters")
+async def master_import_start(callback: CallbackQuery, state: FSMContext):
+    if callback.from_user.id != ADMIN_ID:
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    await state.set_state(ImportForm.file)
+    await callback.message.answer(
+        "Отправьте файл XLSX или CSV.\n\n"
+        "Столбцы: Название, Описание, Дата, Стоимость, Педагог, Места, Ссылка, Постер.\n"
+        "Обязательные: Название, Дата, Стоимость, Ссылка.\n"
+        f"Постер — имя файла из папки {MEDIA_DIR}/."
+    )
+    await callback.answer()
+
+
+@router.message(ImportForm.file, F.document)
+async def master_import_file(message: Message, state: FSMContext, services: Services):
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    filename = message.document.file_name or ""
+    if not filename.lower().endswith((".xlsx", ".csv")):
+        await message.answer("Нужен файл .xlsx или .csv")
+        return
+
+    suffix = os.path.splitext(filename)[1]
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+
+    # импорт (и openpyxl за ним) загружается при первом файле
+    from master_import import format_report, import_masterclasses
+
+    try:
+        await message.bot.download(message.document, destination=path)
+        report = await asyncio.to_thread(
+            import_masterclasses, path, filename, services.masters.path, MEDIA_DIR
+        )
+    except ValueError as e:
+        await message.answer(f"Импорт не выполнен: {html.escape(str(e))}")
+        return
+    finally:
+        os.remove(path)
+
+    await asyncio.to_thread(services.masters.load)
+    services.notify_promoted(services.seats.sync(services.masters.all()))
+
+    await message.answer(html.escape(format_report(report)))
+    await state.clear()
+
+
+@router.callback_query(F.data == "delete_master")
+async def master_delete_list(callback: CallbackQuery, services: Services):
+    masters = services.masters.all()
+
+    if not masters:
+        await callback.answer("Нет мастер-классов", show_alert=True)
+        return
 
-# Добавление мастер-классов (пример)
-@router.message(Command("add_masterclass"))
-async def add_masterclass(message: types.Message):
-    if message.from_user.id == ADMIN_ID:
-        await message.answer("Введите данные мастер-класса (название, описание и т.д.)")
+    buttons = [
+        [InlineKeyboardButton(text=f"❌ {m.title}", callback_data=f"del_{i}")]
+        for i, m in enumerate(masters)
+    ]
+
+    await callback.message.answer(
+        "Выберите МК для удаления:",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("del_"))
+async def master_delete_confirm(callback: CallbackQuery, services: Services):
+    index = int(callback.data.split("_")[1])
+
+    if services.masters.remove(index) is not None:
+        services.seats.sync(services.masters.all())
+
+    await callback.answer("Удалено ✅", show_alert=True)
+
+# ================= BROADCAST =================
+
+# сообщения альбома приходят отдельными апдейтами — собираем их по media_group_id
+ALBUM_WAIT = 1.0
+album_buffer = {}
+
+
+SEGMENT_HELP = (
+    "Фильтры: age=7-10 branch=Щербинка interest=робот\n"
+    "Одинаковые фильтры объединяются через ИЛИ, разные — через И."
+)
+
+
+# -------- Команда статистики --------
+
+@router.message(Command("users"))
+async def users_stat(message: Message, command: CommandObject, services: Services):
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    if not command.args:
+        await message.answer(f"👥 Всего пользователей: {len(services.subscribers)}")
+        return
+
+    try:
+        segment = parse_segment(command.args)
+    except ValueError as e:
+        await message.answer(f"{e}\n\n{SEGMENT_HELP}")
+        return
+
+    audience = services.subscribers.resolve(**segment)
+    await message.answer(
+        f"👥 Аудитория ({describe_segment(segment)}): {len(audience)}"
+    )
+
+
+# -------- Воронки и активность --------
+
+@router.message(Command("stats"))
+async def stats(message: Message, services: Services):
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    lines = [f"📈 Уникальных пользователей сегодня: {services.analytics.daily_uniques()}"]
+
+    for name in FUNNELS:
+        lines.append(f"\n<b>{name}</b>")
+        for label, count, rate in services.analytics.funnel(name):
+            lines.append(f"• {label}: {count} ({rate:.0%})")
+
+    for kind, title in (("direction", "Направления"), ("activity", "Активности")):
+        top = services.analytics.top(kind)
+        if top:
+            lines.append(f"\n<b>Топ: {title.lower()}</b>")
+            lines.extend(f"• {value}: {count}" for value, count in top)
+
+    await message.answer("\n".join(lines))
+
+
+# -------- Профилирование --------
+
+@router.message(Command("profile"))
+async def profile(message: Message, command: CommandObject, services: Services, dispatcher: Dispatcher):
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    if not command.args or not command.args.isdigit():
+        await message.answer("Использование: /profile &lt;секунды&gt;")
+        return
+
+    seconds = min(max(int(command.args), 1), PROFILE_MAX_SECONDS)
+    if services.profiler.running:
+        await message.answer("Профилирование уже запущено.")
+        return
+
+    await message.answer(f"⏱ Профилирую {seconds} с…")
+    try:
+        report = await services.profiler.run(dispatcher, seconds)
+    except RuntimeError:
+        # второй /profile успел пройти проверку выше, пока отправлялся ответ
+        await message.answer("Профилирование уже запущено.")
+        return
+
+    await message.answer_document(
+        BufferedInputFile(report.encode("utf-8"), filename="profile.txt"),
+        caption="Отчёт профилирования"
+    )
+
+
+# -------- Запуск рассылки --------
+
+@router.message(Command("broadcast"))
+async def broadcast_start(message: Message, state: FSMContext, command: CommandObject, services: Services):
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    try:
+        segment = parse_segment(command.args)
+    except ValueError as e:
+        await message.answer(f"{e}\n\n{SEGMENT_HELP}")
+        return
+
+    audience = services.subscribers.resolve(**segment)
+
+    await state.set_state(BroadcastForm.content)
+    await state.update_data(segment=segment)
+    await message.answer(
+        f"Аудитория ({describe_segment(segment)}): {len(audience)}\n\n"
+        "Отправьте текст, фото, видео, документ или альбом для рассылки."
+    )
+
+
+# -------- Отправка рассылки --------
+
+@router.message(BroadcastForm.content)
+async def broadcast_send(message: Message, state: FSMContext, services: Services):
+    if message.media_group_id:
+        group = album_buffer.setdefault(message.media_group_id, [])
+        group.append(message)
+        if len(group) > 1:
+            return
+        await asyncio.sleep(ALBUM_WAIT)
+        group = sorted(album_buffer.pop(message.media_group_id), key=lambda m: m.message_id)
+        items = [message_media(m) for m in group]
+        items = [item for item in items if item is not None][:10]
     else:
-        await message.answer("Вы не администратор!")
+        item = message_media(message)
+        items = [item] if item else []
+
+    if not items and not message.text:
+        await message.answer("Отправьте текст, фото, видео, документ или альбом.")
+        return
+
+    data = await state.get_data()
+    segment = data.get("segment") or parse_segment("")
+    users = services.subscribers.resolve(**segment)
+
+    job = BroadcastJob(message.chat.id, message.text, items, users)
+    services.start_broadcast(job)
+
+    await message.answer(f"🚀 Рассылка запущена: {len(users)} получателей")
+    await state.clear()
@@ -0,0 +1,250 @@
+import html
+
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.types import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    Message,
+    ReplyKeyboardMarkup,
+    ReplyKeyboardRemove
+)
+
+from config import ADMIN_ID
+from ingest import format_report
+from keyboards import remove_reply_keyboard
+from services import Services
+from states import ClubForm
+
+router = Router(name=__name__)
+
+BACK_TO_MENU = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅ В меню", callback_data="menu")]
+])
+
+CARD_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text="⬅ Назад", callback_data="list_clubs")],
+    [InlineKeyboardButton(text="⬅ В меню", callback_data="menu")]
+])
+
+def club_list_keyboard(labels, back):
+    # back: «Назад» к выбору возраста (список по направлению)
+    buttons = [
+        [InlineKeyboardButton(text=label, callback_data=f"club_{i}")]
+        for i, label in enumerate(labels)
+    ]
+    if back:
+        buttons.append([InlineKeyboardButton(text="⬅ Назад", callback_data="clubs")])
+    buttons.append([InlineKeyboardButton(text="⬅ В меню", callback_data="menu")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+@router.callback_query(F.data == "clubs")
+async def clubs_start(callback: CallbackQuery, state: FSMContext, services: Services):
+    await state.set_state(ClubForm.age)
+    await services.nav.show(callback, "Укажите возраст:")
+    await callback.answer()
+
+
+@router.message(ClubForm.age)
+async def clubs_age(message: Message, state: FSMContext, services: Services):
+    if not message.text.isdigit():
+        await message.answer("Введите возраст числом.")
+        return
+
+    # location_kb: показана кнопка геолокации, её нужно убрать при выходе
+    await state.update_data(age=int(message.text), location_kb=True)
+    await state.set_state(ClubForm.address)
+    services.subscribers.set_age(message.from_user.id, int(message.text))
+
+    location_kb = ReplyKeyboardMarkup(
+        keyboard=[[KeyboardButton(text="📍 Отправить геолокацию", request_location=True)]],
+        resize_keyboard=True,
+        one_time_keyboard=True
+    )
+
+    buttons = [
+        [InlineKeyboardButton(text=name, callback_data=f"addr_{i}")]
+        for i, name in enumerate(services.catalog.branches)
+    ]
+    buttons.append([InlineKeyboardButton(text="⬅ В меню", callback_data="menu")])
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+
+    # экран редактируется на месте, поэтому подсказка с геолокацией идёт после него
+    await services.nav.show(message, "Выберите подразделение:", reply_markup=keyboard)
+    await message.answer(
+        "Или отправьте геолокацию — покажу ближайшие кружки.",
+        reply_markup=location_kb
+    )
+
+
+@router.message(ClubForm.address, F.location)
+async def clubs_location(message: Message, state: FSMContext, services: Services):
+    services.analytics.track_goal(message.from_user.id, "club_place")
+    data = await state.get_data()
+    nearest = services.catalog.nearest(
+        message.location.latitude,
+        message.location.longitude,
+        data["age"]
+    )
+
+    if not nearest:
+        await message.answer(
+            "Подходящих кружков не найдено.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        await state.clear()
+        return
+
+    services.subscribers.add_branch(message.from_user.id, nearest[0][1].branch)
+    services.analytics.track_goal(message.from_user.id, "club_list")
+
+    result = [club for _, club in nearest]
+    labels = [f"{club.name} · {distance:.1f} км" for distance, club in nearest]
+    title = "📍 Ближайшие кружки:"
+    await state.update_data(clubs=result, labels=labels, title=title, back=False, location_kb=False)
+    await state.set_state(ClubForm.clubs)
+
+    await services.nav.show(message, title, reply_markup=club_list_keyboard(labels, False))
+    await message.answer("Список ближайших кружков — выше ⬆", reply_markup=ReplyKeyboardRemove())
+
+
+@router.callback_query(F.data.startswith("addr_"))
+async def clubs_address(callback: CallbackQuery, state: FSMContext, services: Services):
+    index = int(callback.data.split("_")[1])
+    data = await state.get_data()
+
+    if index >= len(services.catalog.branches):
+        await callback.answer("Ошибка выбора", show_alert=True)
+        return
+
+    branch_name = services.catalog.branches[index]
+    services.subscribers.add_branch(callback.from_user.id, branch_name)
+    services.analytics.track_goal(callback.from_user.id, "club_place")
+
+    if data.get("location_kb"):
+        await remove_reply_keyboard(callback.bot, callback.from_user.id)
+        await state.update_data(location_kb=False)
+
+    filtered = services.catalog.for_age(data["age"], branch_name)
+
+    if not filtered:
+        await services.nav.show(callback, "Подходящих кружков не найдено.", reply_markup=BACK_TO_MENU)
+        await state.clear()
+        await callback.answer()
+        return
+
+    directions = sorted(set(c.direction for c in filtered))
+    await state.update_data(clubs=filtered)
+
+    buttons = [
+        [InlineKeyboardButton(text=d, callback_data=f"dir_{i}")]
+        for i, d in enumerate(directions)
+    ]
+    buttons.append([InlineKeyboardButton(text="⬅ В меню", callback_data="menu")])
+
+    await services.nav.show(
+        callback,
+        "Выберите направление:",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+    )
+
+    await state.set_state(ClubForm.direction)
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("dir_"))
+async def clubs_direction(callback: CallbackQuery, state: FSMContext, services: Services):
+    index = int(callback.data.split("_")[1])
+    data = await state.get_data()
+
+    clubs = data["clubs"]
+    directions = sorted(set(c.direction for c in clubs))
+
+    if index >= len(directions):
+        await callback.answer("Ошибка выбора", show_alert=True)
+        return
+
+    selected_direction = directions[index]
+    result = [c for c in clubs if c.direction == selected_direction]
+    services.subscribers.add_interest(callback.from_user.id, selected_direction)
+    services.analytics.track_choice(callback.from_user.id, "direction", selected_direction)
+    services.analytics.track_goal(callback.from_user.id, "club_list")
+
+    labels = [c.name for c in result]
+    await state.update_data(clubs=result, labels=labels, title="Выберите кружок:", back=True)
+
+    await services.nav.show(callback, "Выберите кружок:", reply_markup=club_list_keyboard(labels, True))
+
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("club_"))
+async def club_card(callback: CallbackQuery, state: FSMContext, services: Services):
+    index = int(callback.data.split("_")[1])
+    data = await state.get_data()
+
+    clubs = data["clubs"]
+
+    if index >= len(clubs):
+        await callback.answer("Ошибка выбора", show_alert=True)
+        return
+
+    club = clubs[index]
+
+    text = (
+        f"<b>{club.name}</b>\n\n"
+        f"Возраст: {club.age}\n"
+        f"Педагог: {club.teacher}\n"
+        f"Адрес: {club.address or 'онлайн'}\n\n"
+        f"<a href='{club.link}'>Перейти к записи</a>"
+    )
+
+    await services.nav.show(callback, text, reply_markup=CARD_KB)
+
+    await callback.answer()
+
+
+@router.callback_query(F.data == "list_clubs")
+async def club_list_back(callback: CallbackQuery, state: FSMContext, services: Services):
+    # карточка заменила список на том же экране — рисуем список заново из FSM
+    data = await state.get_data()
+    if "labels" not in data:
+        await services.nav.show(callback, "Список устарел, начните заново.", reply_markup=BACK_TO_MENU)
+        await callback.answer()
+        return
+
+    await services.nav.show(
+        callback,
+        data["title"],
+        reply_markup=club_list_keyboard(data["labels"], data["back"])
+    )
+    await callback.answer()
+
+# ================= RELOAD =================
+
+@router.message(Command("reload_catalog"))
+async def reload_catalog(message: Message, services: Services):
+    if message.from_user.id != ADMIN_ID:
+        return
+
+    try:
+        diff, notified = await services.reload_catalog()
+    except ValueError as e:
+        await message.answer(f"Каталог не обновлён: {html.escape(str(e))}")
+        return
+    if diff is None:
+        await message.answer("Каталог не изменился.")
+        return
+
+    await message.answer(
+        f"📚 Каталог обновлён: {len(services.catalog.clubs)} кружков\n\n"
+        f"🆕 Новых: {len(diff['added'])}\n"
+        f"✏ Изменённых: {len(diff['changed'])}\n"
+        f"🗑 Удалённых: {len(diff['removed'])}\n\n"
+        f"🔔 Уведомлено подписчиков: {notified}"
+    )
+    await message.answer(html.escape(format_report(diff["report"])))
@@ -1,11 +1,258 @@
-from aiogram import types
-from aiogram.dispatcher import FSMContext
-from aiogram import Router
+from aiogram import F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-router = Router()
+from config import ADMIN_ID
+from keyboards import profile_link
+from services import Services
+from states import MasterForm
 
-@router.message(Command("masterclasses"))
-async def show_masterclasses(message: types.Message):
-    # Пример вывода мастер-классов
-    text = "Доступные мастер-классы:\n1. Мастер-класс по керамике\n2. Мастер-класс по кулинарии"
-    await message.answer(text)
+router = Router(name=__name__)
+
+# текст подписи к фото в Telegram ограничен 1024 символами
+CAPTION_LIMIT = 1024
+
+# ---------- Пользователь ----------
+
+@router.callback_query(F.data == "masters")
+async def masters_list(callback: CallbackQuery, services: Services):
+    masters = services.masters.all()
+
+    if not masters:
+        await services.nav.show(
+            callback,
+            "Мастер-классы пока не добавлены.",
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text="⬅ В меню", callback_data="menu")]
+            ])
+        )
+        await callback.answer()
+        return
+
+    buttons = [
+        [InlineKeyboardButton(text=m.title, callback_data=f"master_{i}")]
+        for i, m in enumerate(masters)
+    ]
+    buttons.append([InlineKeyboardButton(text="⬅ В меню", callback_data="menu")])
+
+    await services.nav.show(
+        callback,
+        "Доступные мастер-классы:",
+        reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons)
+    )
+    await callback.answer()
+
+
+def seats_line(seats, master_id):
+    left = seats.seats_left(master_id)
+    if left is None:
+        return "🪑 <b>Мест:</b> без ограничений"
+    if left == 0:
+        return "🪑 <b>Мест нет</b> — запись в лист ожидания"
+    return f"🪑 <b>Свободных мест:</b> {left} из {seats.capacity[master_id]}"
+
+
+@router.callback_query(F.data.startswith("master_"))
+async def master_card(callback: CallbackQuery, services: Services):
+    index = int(callback.data.split("_")[1])
+    masters = services.masters.all()
+
+    if index >= len(masters):
+        await callback.answer("Ошибка выбора", show_alert=True)
+        return
+
+    m = masters[index]
+
+    def card_text(description):
+        return (
+            f"━━━━━━━━━━━━━━━\n"
+            f"🎨 <b>{m.title}</b>\n"
+            f"━━━━━━━━━━━━━━━\n\n"
+            f"📝 <b>Описание:</b>\n"
+            f"{description}\n\n"
+            f"📅 <b>Дата и время:</b> {m.date}\n"
+            f"💰 <b>Стоимость:</b> {m.price} ₽\n"
+            f"👩‍🏫 <b>Педагог:</b> {m.teacher}\n"
+            f"{seats_line(services.seats, m.id)}\n\n"
+            f"🔗 <a href='{m.link}'>Подробнее</a>\n\n"
+            f"━━━━━━━━━━━━━━━"
+        )
+
+    text = card_text(m.description)
+
+    status, _ = services.seats.status(m.id, callback.from_user.id)
+    if status is None:
+        enroll_button = InlineKeyboardButton(text="✉ Записаться", callback_data=f"enroll_{m.id}")
+    else:
+        enroll_button = InlineKeyboardButton(text="❌ Отменить запись", callback_data=f"unbook_{m.id}")
+
+    buttons = [
+        [enroll_button],
+        [InlineKeyboardButton(text="⬅ Назад", callback_data="masters")],
+        [InlineKeyboardButton(text="⬅ В меню", callback_data="menu")]
+    ]
+
+    attachments = m.media
+    poster = attachments[0] if attachments and attachments[0]["kind"] == "photo" else None
+    if len(attachments) > (1 if poster else 0):
+        buttons.insert(1, [InlineKeyboardButton(text="📎 Материалы", callback_data=f"mcfiles_{index}")])
+    keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
+
+    if poster is not None and len(text) > CAPTION_LIMIT:
+        # карточка — одно сообщение: описание укорачивается под подпись,
+        # а если не помогает и это, постер не показывается
+        excess = len(text) - CAPTION_LIMIT + 1
+        if excess < len(m.description):
+            text = card_text(m.description[:-excess].rstrip() + "…")
+        else:
+            poster = None
+
+    if poster is None:
+        await services.nav.show(callback, text, reply_markup=keyboard)
+    else:
+        await services.nav.show_media(
+            callback, services.media, "photo", poster["source"],
+            caption=text, reply_markup=keyboard
+        )
+
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("mcfiles_"))
+async def master_files(callback: CallbackQuery, services: Services):
+    index = int(callback.data.split("_")[1])
+    masters = services.masters.all()
+
+    if index >= len(masters):
+        await callback.answer("Ошибка выбора", show_alert=True)
+        return
+
+    attachments = masters[index].media
+    if attachments and attachments[0]["kind"] == "photo":
+        attachments = attachments[1:]
+
+    # альбом в Telegram — от 2 до 10 элементов; документы не смешиваются с фото/видео
+    documents = [a for a in attachments if a["kind"] == "document"]
+    visual = [a for a in attachments if a["kind"] in ("photo", "video")]
+    singles = [a for a in attachments if a["kind"] == "animation"]
+
+    for group in (visual, documents):
+        for start in range(0, len(group), 10):
+            chunk = group[start:start + 10]
+            if len(chunk) == 1:
+                singles.extend(chunk)
+            else:
+                await services.media.send_group(callback.bot, callback.message.chat.id, chunk)
+
+    for item in singles:
+        await services.media.send(
+            callback.bot, callback.message.chat.id, item["kind"], item["source"],
+            caption=item.get("caption") or None
+        )
+
+    await callback.answer()
+
+
+# ---------- Запись на МК с вводом данных ----------
+
+@router.callback_query(F.data.startswith("enroll_"))
+async def master_enroll_start(callback: CallbackQuery, state: FSMContext, services: Services):
+    master_id = callback.data.split("_", 1)[1]
+
+    if services.masters.find(master_id) is None:
+        await callback.answer("Ошибка", show_alert=True)
+        return
+
+    status, position = services.seats.status(master_id, callback.from_user.id)
+    if status == "booked":
+        await callback.answer("Вы уже записаны ✅", show_alert=True)
+        return
+    if status == "waiting":
+        await callback.answer(f"Вы в листе ожидания, место в очереди: {position}", show_alert=True)
+        return
+
+    await state.update_data(enroll_id=master_id)
+    await state.set_state(MasterForm.enroll_name)
+
+    await callback.message.answer("Как к вам обращаться?")
+    await callback.answer()
+
+
+@router.message(MasterForm.enroll_name)
+async def master_enroll_name(message: Message, state: FSMContext):
+    await state.update_data(enroll_name=message.text.strip())
+    await state.set_state(MasterForm.enroll_phone)
+    await message.answer("Введите номер телефона для связи:")
+
+
+@router.message(MasterForm.enroll_phone)
+async def master_enroll_finish(message: Message, state: FSMContext, services: Services):
+    data = await state.get_data()
+
+    m = services.masters.find(data["enroll_id"])
+    if m is None:
+        await message.answer("Ошибка.")
+        await state.clear()
+        return
+
+    name = data["enroll_name"]
+    phone = message.text.strip()
+
+    # бронь выполняется без await между проверкой и записью — место не уйдёт дважды
+    result, position = services.seats.book(m.id, message.from_user.id, {"name": name, "phone": phone})
+
+    if result == "already":
+        await message.answer("Вы уже записаны на этот мастер-класс.")
+        await state.clear()
+        return
+
+    title = "Новая запись на мастер-класс" if result == "booked" else "Лист ожидания мастер-класса"
+    services.outbox.send_message(
+        ADMIN_ID,
+        f"📚 <b>{title}</b>\n\n"
+        f"<b>{m.title}</b>\n\n"
+        f"👤 Имя: {name}\n"
+        f"📞 Телефон: {phone}\n\n"
+        f"Профиль: {profile_link(message.from_user)}\n"
+        f"TG ID: {message.from_user.id}\n\n"
+        f"{seats_line(services.seats, m.id)}",
+        disable_web_page_preview=True
+    )
+
+    services.analytics.track_goal(message.from_user.id, "enroll")
+
+    if result == "booked":
+        await message.answer("Вы записаны ✅ Заявка отправлена администратору.")
+    else:
+        await message.answer(
+            f"Свободных мест нет. Вы в листе ожидания, место в очереди: {position}.\n"
+            "Если место освободится, мы запишем вас автоматически и сообщим."
+        )
+    await state.clear()
+
+
+@router.callback_query(F.data.startswith("unbook_"))
+async def master_unbook(callback: CallbackQuery, services: Services):
+    master_id = callback.data.split("_", 1)[1]
+    m = services.masters.find(master_id)
+
+    status, _ = services.seats.status(master_id, callback.from_user.id)
+    if m is None or status is None:
+        await callback.answer("Записи не найдено", show_alert=True)
+        return
+
+    promoted = services.seats.cancel(master_id, callback.from_user.id)
+
+    services.outbox.send_message(
+        ADMIN_ID,
+        f"🚫 <b>Отмена записи</b>\n\n"
+        f"<b>{m.title}</b>\n"
+        f"Профиль: {profile_link(callback.from_user)}\n"
+        f"TG ID: {callback.from_user.id}\n\n"
+        f"{seats_line(services.seats, master_id)}",
+        disable_web_page_preview=True
+    )
+    services.notify_promoted(promoted)
+
+    await callback.message.answer("Запись отменена.")
+    await callback.answer()
@@ -1,10 +1,161 @@
-from aiogram import types
-from aiogram.dispatcher import FSMContext
-from aiogram import Router
+from aiogram import F, Router
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-router = Router()
+from config import ADMIN_ID
+from keyboards import profile_link
+from services import Services
+from states import PackageForm
 
-@router.message(Command("packages"))
-async def show_packages(message: types.Message):
-    text = "Пакетные туры:\n1. Активности для групп\n2. Праздники и события"
-    await message.answer(text)
+router = Router(name=__name__)
+
+PACKAGE_MODULES = {
+    "Картинг": [2200, 2100, 2000],
+    "Симрейсинг": [1600, 1500, 1400],
+    "Практическая стрельба": [1600, 1500, 1400],
+    "Лазертаг": [1600, 1500, 1400],
+    "Керамика": [1600, 1500, 1400],
+    "Мягкая игрушка": [1300, 1200, 1100],
+}
+
+
+def activities_keyboard(selected=None):
+    selected = selected or []
+    buttons = []
+
+    for i, name in enumerate(PACKAGE_MODULES.keys()):
+        prefix = "✅ " if name in selected else ""
+        buttons.append([
+            InlineKeyboardButton(
+                text=f"{prefix}{name}",
+                callback_data=f"act_{i}"
+            )
+        ])
+
+    buttons.append([InlineKeyboardButton(text="🟢 Готово", callback_data="act_done")])
+    buttons.append([InlineKeyboardButton(text="⬅ В меню", callback_data="menu")])
+
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+@router.callback_query(F.data == "packages")
+async def package_start(callback: CallbackQuery, state: FSMContext):
+    await state.set_state(PackageForm.people)
+    await callback.message.answer(
+        "👥 Введите количество человек (минимум 5):"
+    )
+    await callback.answer()
+
+
+@router.message(PackageForm.people)
+async def package_people(message: Message, state: FSMContext):
+    if not message.text.isdigit() or int(message.text) < 5:
+        await message.answer("Минимум 5 человек.")
+        return
+
+    await state.update_data(
+        people=int(message.text),
+        selected=[]
+    )
+    await state.set_state(PackageForm.activities)
+
+    await message.answer(
+        "🎯 Выберите от 1 до 3 активностей:",
+        reply_markup=activities_keyboard()
+    )
+
+
+@router.callback_query(F.data.startswith("act_"))
+async def package_choose_activity(callback: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    selected = data.get("selected", [])
+
+    if callback.data == "act_done":
+        if not 1 <= len(selected) <= 3:
+            await callback.answer("Выберите 1–3 активности", show_alert=True)
+            return
+
+        await state.set_state(PackageForm.name)
+        await callback.message.answer("Введите ваше имя:")
+        await callback.answer()
+        return
+
+    index = int(callback.data.split("_")[1])
+    activity = list(PACKAGE_MODULES.keys())[index]
+
+    if activity in selected:
+        selected.remove(activity)
+    else:
+        if len(selected) >= 3:
+            await callback.answer("Можно выбрать максимум 3 активности", show_alert=True)
+            return
+        selected.append(activity)
+
+    await state.update_data(selected=selected)
+
+    # обновляем клавиатуру с галочками
+    await callback.message.edit_reply_markup(
+        reply_markup=activities_keyboard(selected)
+    )
+    await callback.answer()
+
+
+@router.message(PackageForm.name)
+async def package_name(message: Message, state: FSMContext):
+    await state.update_data(name=message.text.strip())
+    await state.set_state(PackageForm.phone)
+    await message.answer("📞 Введите телефон для связи:")
+
+
+@router.message(PackageForm.phone)
+async def package_finish(message: Message, state: FSMContext, services: Services):
+    data = await state.get_data()
+
+    people = data["people"]
+    selected = data["selected"]
+    name = data["name"]
+    phone = message.text.strip()
+
+    price_index = len(selected) - 1
+
+    total = 0
+    per_person_total = 0
+    lines = []
+
+    for act in selected:
+        price = PACKAGE_MODULES[act][price_index]
+        cost = price * people
+        total += cost
+        per_person_total += price
+        lines.append(f"• {act}: <b>{price} ₽</b> с человека")
+
+    activities_text = "\n".join(lines)
+
+    for act in selected:
+        services.subscribers.add_interest(message.from_user.id, act)
+        services.analytics.track_choice(message.from_user.id, "activity", act)
+    services.analytics.track_goal(message.from_user.id, "package")
+
+    services.outbox.send_message(
+        ADMIN_ID,
+        f"🎉 Новая заявка на пакетный тур\n\n"
+        f"Клиент: {name}\n"
+        f"Телефон: {phone}\n"
+        f"Профиль: {profile_link(message.from_user)}\n"
+        f"TG ID: {message.from_user.id}\n\n"
+        f"Группа: {people} человек\n"
+        f"Активности: {', '.join(selected)}\n\n"
+        f"{activities_text}\n\n"
+        f"С человека: {per_person_total} ₽\n"
+        f"Общая сумма: {total} ₽",
+        disable_web_page_preview=True
+    )
+
+    await message.answer(
+        f"✅ Ваша заявка принята!\n\n"
+        f"{activities_text}\n\n"
+        f"💰 С человека: {per_person_total} ₽\n"
+        f"👥 Общая сумма: {total} ₽",
+    )
+
+    await state.clear()
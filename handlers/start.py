@@ -1,9 +1,74 @@
-from aiogram import types
-from aiogram import Router
-from keyboards import bottom_kb
+from aiogram import F, Router
+from aiogram.filters import CommandStart
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-router = Router()
+from keyboards import main_menu, remove_reply_keyboard
+from services import Services
 
-@router.message(Command("start"))
-async def start(message: types.Message):
-    await message.answer("Привет! Я Бот Виктор! Чем могу помочь?", reply_markup=bottom_kb())
+router = Router(name=__name__)
+
+# ================= START =================
+
+@router.message(CommandStart())
+async def start(message: Message, services: Services):
+    services.subscribers.add(message.from_user.id)
+
+    await message.answer(
+        "Приветствую! Я Бот Виктор!\n"
+        "Я помогу вам выбрать интересные занятия в нашем центре.\n\n"
+        "Выберите раздел:",
+        reply_markup=main_menu(message.from_user.id)
+    )
+
+# ================= MENU =================
+
+@router.callback_query(F.data == "menu")
+async def menu(callback: CallbackQuery, state: FSMContext, services: Services):
+    data = await state.get_data()
+    await state.clear()
+    if data.get("location_kb"):
+        await remove_reply_keyboard(callback.bot, callback.from_user.id)
+    await services.nav.show(
+        callback,
+        "Главное меню:",
+        reply_markup=main_menu(callback.from_user.id)
+    )
+    await callback.answer()
+
+# ================= NOTIFICATIONS =================
+
+@router.callback_query(F.data == "manage_notifications")
+async def manage_notifications(callback: CallbackQuery):
+    kb = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(
+                text="🔕 Отписаться от рассылки",
+                callback_data="unsubscribe_confirm"
+            )],
+            [InlineKeyboardButton(
+                text="⬅ Назад",
+                callback_data="close_manage"
+            )]
+        ]
+    )
+
+    await callback.message.edit_reply_markup(reply_markup=kb)
+    await callback.answer()
+
+
+@router.callback_query(F.data == "unsubscribe_confirm")
+async def unsubscribe_confirm(callback: CallbackQuery, services: Services):
+    services.subscribers.remove(callback.from_user.id)
+
+    await callback.message.edit_text(
+        "🔕 Вы отписались от рассылки.\n\n"
+        "Чтобы снова получать уведомления — нажмите /start"
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "close_manage")
+async def close_manage(callback: CallbackQuery):
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await callback.answer()
@@ -1,11 +1,172 @@
-from aiogram import types
-from aiogram import Router
-from config import ADMIN_ID
+import html
+from datetime import datetime
 
-router = Router()
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
-@router.message(lambda message: message.text.lower() == "написать в поддержку")
-async def write_to_support(message: types.Message):
-    tg_id = message.from_user.id
-    await message.bot.send_message(ADMIN_ID, f"Новый запрос от пользователя: {tg_id}")
-    await message.answer("Ваш запрос отправлен в поддержку. Мы скоро с вами свяжемся.")
+from config import ADMIN_IDS
+from keyboards import profile_link
+from services import Services
+from states import SupportForm
+from tickets import OPEN
+
+router = Router(name=__name__)
+
+HISTORY_MESSAGES = 20
+MESSAGE_LIMIT = 4096
+
+
+def close_keyboard(ticket_id):
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=f"✅ Закрыть #{ticket_id}", callback_data=f"tclose_{ticket_id}")]
+    ])
+
+
+def forward_to_admin(services, ticket, user, text, created):
+    title = "Новое обращение" if created else "Сообщение в обращении"
+    services.outbox.send_message(
+        ticket["admin"],
+        f"✉ <b>{title} #{ticket['id']}</b>\n\n"
+        f"Профиль: {profile_link(user)}\n"
+        f"TG ID: {user.id}\n\n"
+        f"{html.escape(text)}\n\n"
+        "<i>Ответьте на это сообщение, чтобы написать пользователю.</i>",
+        disable_web_page_preview=True,
+        reply_markup=close_keyboard(ticket["id"]),
+        on_sent=lambda sent: services.tickets.link(sent.chat.id, sent.message_id, ticket["id"])
+    )
+
+
+def forward_to_user(services, ticket, text):
+    services.outbox.send_message(
+        ticket["uid"],
+        f"💬 <b>Ответ поддержки</b> (обращение #{ticket['id']})\n\n"
+        f"{html.escape(text)}\n\n"
+        "<i>Ответьте на это сообщение, чтобы продолжить диалог.</i>",
+        on_sent=lambda sent: services.tickets.link(sent.chat.id, sent.message_id, ticket["id"])
+    )
+
+
+# ================= USER =================
+
+@router.callback_query(F.data == "support")
+async def support_start(callback: CallbackQuery, state: FSMContext):
+    await state.set_state(SupportForm.text)
+    await callback.message.answer("Напишите ваше сообщение:")
+    await callback.answer()
+
+
+@router.message(SupportForm.text)
+async def support_send(message: Message, state: FSMContext, services: Services):
+    text = message.text or message.caption
+    if not text:
+        await message.answer("Напишите сообщение текстом.")
+        return
+
+    ticket, created = services.tickets.open_ticket(message.from_user.id)
+    services.tickets.add_message(ticket, "user", text)
+    forward_to_admin(services, ticket, message.from_user, text, created)
+
+    await message.answer(
+        f"Сообщение отправлено в поддержку ✅ Обращение #{ticket['id']}.\n"
+        "Ответ придёт в этот чат."
+    )
+    await state.clear()
+
+
+# ---------- Ответ на пересланное сообщение ----------
+
+def replied_ticket(message: Message, services: Services):
+    # фильтр: ответ на сообщение, связанное с обращением
+    ticket = services.tickets.route(message.chat.id, message.reply_to_message.message_id)
+    return {"ticket": ticket} if ticket else False
+
+
+@router.message(F.reply_to_message, F.text, replied_ticket)
+async def ticket_reply(message: Message, ticket: dict, services: Services):
+    tickets = services.tickets
+
+    if message.from_user.id in ADMIN_IDS and message.from_user.id != ticket["uid"]:
+        if ticket["status"] != OPEN:
+            await message.answer(f"Обращение #{ticket['id']} уже закрыто.")
+            return
+        tickets.add_message(ticket, "admin", message.text)
+        forward_to_user(services, ticket, message.text)
+        await message.answer(f"Ответ отправлен пользователю (#{ticket['id']}) ✅")
+        return
+
+    # пользователь: продолжаем открытое обращение или открываем новое
+    ticket, created = tickets.open_ticket(message.from_user.id)
+    tickets.add_message(ticket, "user", message.text)
+    forward_to_admin(services, ticket, message.from_user, message.text, created)
+    await message.answer("Сообщение отправлено в поддержку ✅")
+
+
+# ================= ADMIN =================
+
+@router.callback_query(F.data.startswith("tclose_"))
+async def ticket_close(callback: CallbackQuery, services: Services):
+    if callback.from_user.id not in ADMIN_IDS:
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    ticket = services.tickets.close(int(callback.data.split("_")[1]))
+    if ticket is None:
+        await callback.answer("Обращение уже закрыто", show_alert=True)
+        return
+
+    services.outbox.send_message(
+        ticket["uid"],
+        f"✅ Обращение #{ticket['id']} закрыто.\n"
+        "Если остались вопросы — напишите в поддержку снова."
+    )
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await callback.answer("Закрыто ✅")
+
+
+@router.message(Command("tickets"))
+async def tickets_list(message: Message, services: Services):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+
+    tickets = services.tickets
+    mine = tickets.assigned(message.from_user.id)
+    lines = [
+        f"📨 Открытых обращений: {len(tickets.by_status[OPEN])}, у вас: {len(mine)}"
+    ]
+    for ticket in mine:
+        last = ticket["messages"][-1]["text"] if ticket["messages"] else ""
+        lines.append(f"\n#{ticket['id']} · TG ID {ticket['uid']}\n{html.escape(last[:100])}")
+
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("history"))
+async def tickets_history(message: Message, command: CommandObject, services: Services):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+
+    if not command.args or not command.args.strip().isdigit():
+        await message.answer("Использование: /history &lt;TG ID&gt;")
+        return
+
+    history = services.tickets.history(int(command.args))
+    if not history:
+        await message.answer("Обращений нет.")
+        return
+
+    lines = []
+    for ticket in history:
+        status = "открыто" if ticket["status"] == OPEN else "закрыто"
+        lines.append(f"\n<b>#{ticket['id']}</b> ({status})")
+        for m in ticket["messages"][-HISTORY_MESSAGES:]:
+            who = "👤" if m["from"] == "user" else "🛟"
+            when = datetime.fromtimestamp(m["ts"]).strftime("%d.%m %H:%M")
+            lines.append(f"{who} {when}: {html.escape(m['text'])}")
+
+    # сообщение в Telegram ограничено 4096 символами — показываем последние строки
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > MESSAGE_LIMIT:
+        lines.pop(0)
+    await message.answer("\n".join(lines).strip()[:MESSAGE_LIMIT])
@@ -0,0 +1,211 @@
+import hashlib
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from tables import MAX_AGE, add_error, cell, error_lines, iter_rows, map_columns
+
+logger = logging.getLogger(__name__)
+
+# заголовок столбца (в нижнем регистре) → поле кружка
+HEADERS = {
+    "направление": "direction",
+    "наименование третьего уровня рбндо": "direction",
+    "название": "name",
+    "наименование": "name",
+    "кружок": "name",
+    "наименование детского объединения": "name",
+    "возраст": "age",
+    "адрес": "address",
+    "адрес предоставления услуги": "address",
+    "педагог": "teacher",
+    "ссылка": "link",
+}
+
+FIELDS = ("direction", "name", "age", "address", "teacher", "link")
+# пустой адрес — онлайн-занятия
+REQUIRED = ("direction", "name", "age", "link")
+FIELD_NAMES = {
+    "direction": "направление", "name": "название", "age": "возраст",
+    "address": "адрес", "teacher": "педагог", "link": "ссылка",
+}
+
+MAX_WORKERS = 4
+
+
+# ================= НОРМАЛИЗАЦИЯ =================
+
+AGE_RANGE = re.compile(r"(\d+)\s*(?:-|–|—|до)\s*(\d+)")
+AGE_FROM = re.compile(r"(\d+)\s*\+|\b(?:от|с)\s*(\d+)")
+AGE_TO = re.compile(r"\bдо\s*(\d+)")
+AGE_EXACT = re.compile(r"(\d+)\s*(?:лет|год|года)?")
+
+# сокращения в адресах из разных таблиц → как в club_coordinates.csv
+ADDRESS_ABBREVIATIONS = [
+    (re.compile(r"\bг\.\s*"), "город "),
+    (re.compile(r"\bул\.\s*"), "улица "),
+    (re.compile(r"\bш\.\s*"), "шоссе "),
+    (re.compile(r"\bд\.\s*"), "дом "),
+    (re.compile(r"\bкорп\.\s*|\bк\.\s*"), "корпус "),
+    (re.compile(r"\bстр\.\s*"), "строение "),
+]
+
+
+def parse_age_range(age_text):
+    # «5-7», «5–7 лет», «от 5 до 7», «12+», «с 3 лет», «до 7», «6»
+    if not age_text:
+        return None, None
+    text = str(age_text).lower()
+
+    match = AGE_RANGE.search(text)
+    if match:
+        low, high = int(match.group(1)), int(match.group(2))
+        return (low, high) if low <= high else (None, None)
+
+    match = AGE_FROM.search(text)
+    if match:
+        return int(match.group(1) or match.group(2)), MAX_AGE
+
+    match = AGE_TO.search(text)
+    if match:
+        return 0, int(match.group(1))
+
+    match = AGE_EXACT.fullmatch(text.strip())
+    if match:
+        age = int(match.group(1))
+        return age, age
+    return None, None
+
+
+def normalize_address(address):
+    if address is None:
+        return ""
+    text = str(address).lower().replace("ё", "е")
+    for pattern, replacement in ADDRESS_ABBREVIATIONS:
+        text = pattern.sub(replacement, text)
+    return " ".join(text.replace(" ,", ",").split())
+
+
+def clean_text(value):
+    return " ".join(cell(value).split())
+
+
+def club_key(*values):
+    return "|".join(normalize_address(v) for v in values)
+
+
+# ================= ИСТОЧНИКИ =================
+
+def read_source(path):
+    # -> (строки, ошибки источника); вызывается в рабочем потоке.
+    # failed — источник не прочитан целиком (например, файл ещё копируется)
+    rows, report = [], {"errors": [], "error_count": 0, "failed": False}
+    source = os.path.basename(path)
+    try:
+        _read_rows(path, source, rows, report)
+    except ValueError as e:
+        add_error(report, f"{source}: {e}")
+        report["failed"] = True
+    return rows, report
+
+
+def _read_rows(path, source, rows, report):
+    records = iter_rows(path)
+    header = next(records, None)
+    if header is None:
+        add_error(report, f"{source}: файл пуст")
+        report["failed"] = True
+        return
+
+    columns = map_columns(header, HEADERS)
+    missing = [FIELD_NAMES[f] for f in REQUIRED if f not in columns]
+    if missing:
+        add_error(report, f"{source}: нет столбцов: " + ", ".join(missing))
+        report["failed"] = True
+        return
+
+    for line_no, record in enumerate(records, start=2):
+        raw = {f: record[i] if i < len(record) else None for f, i in columns.items()}
+        values = {f: clean_text(raw.get(f)) for f in FIELDS}
+        if not any(values.values()):
+            continue
+
+        error = validate(values, raw.get("age"))
+        if error:
+            add_error(report, f"{source}, строка {line_no}: {error}")
+            continue
+
+        min_age, max_age = parse_age_range(values["age"])
+        rows.append((*(values[f] for f in FIELDS), min_age, max_age))
+
+
+def validate(values, raw_age):
+    missing = [FIELD_NAMES[f] for f in REQUIRED if not values[f]]
+    if missing:
+        return "не заполнено: " + ", ".join(missing)
+
+    # «5-7» в Excel часто превращается в дату 5 июля
+    if isinstance(raw_age, date):
+        return f"возраст сохранён как дата «{raw_age:%d.%m}»"
+    if parse_age_range(values["age"]) == (None, None):
+        return f"не распознан возраст «{values['age']}»"
+
+    if not values["link"].startswith(("http://", "https://")):
+        return f"неверная ссылка «{values['link']}»"
+    return None
+
+
+def sources_digest(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ================= СБОРКА =================
+
+def ingest(paths, workers=MAX_WORKERS):
+    # Источники читаются параллельно в потоках (openpyxl в read_only),
+    # затем объединяются в порядке paths: при совпадении названия,
+    # адреса и педагога остаётся строка из первого источника.
+    # -> (строки: direction, name, age, address, teacher, link, min_age, max_age; отчёт)
+    report = {"sources": {}, "duplicates": 0, "errors": [], "error_count": 0, "failed": []}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        results = list(pool.map(read_source, paths))
+
+    rows = []
+    seen = set()
+    for path, (source_rows, errors) in zip(paths, results):
+        report["sources"][os.path.basename(path)] = len(source_rows)
+        if errors["failed"]:
+            report["failed"].append(os.path.basename(path))
+        for error in errors["errors"]:
+            add_error(report, error)
+        report["error_count"] += errors["error_count"] - len(errors["errors"])
+
+        for row in source_rows:
+            key = club_key(row[1], row[3], row[4])
+            if key in seen:
+                report["duplicates"] += 1
+                continue
+            seen.add(key)
+            rows.append(row)
+
+    for error in report["errors"]:
+        logger.warning("Каталог: %s", error)
+    return rows, report
+
+
+def format_report(report):
+    lines = ["📚 Источники каталога:"]
+    lines.extend(f"• {name}: {count}" for name, count in report["sources"].items())
+    lines.append(f"\n↩ Дубликатов (пропущено): {report['duplicates']}")
+    lines.append(f"⚠ Строк с ошибками: {report['error_count']}")
+    lines.extend(error_lines(report))
+    return "\n".join(lines)
@@ -1,20 +1,43 @@
-from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, KeyboardButton
-from handlers.packages import PACKAGE_MODULES
-
-# Основная клавиатура
-def bottom_kb():
-    keyboard = ReplyKeyboardMarkup(resize_keyboard=True)
-    keyboard.add(KeyboardButton("Написать в поддержку"))
-    return keyboard
-
-# Клавиатура для выбора активностей
-def activities_keyboard(selected=None):
-    selected = selected or []
-    keyboard = InlineKeyboardMarkup(row_width=2)
-    
-    for name in PACKAGE_MODULES:
-        text = f"{'✅ ' if name in selected else ''}{name}"
-        keyboard.add(InlineKeyboardButton(text=text, callback_data=f"activity_{name}"))
-        
-    keyboard.add(InlineKeyboardButton("🟢 Готово", callback_data="done"))
-    return keyboard
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove
+
+from config import ADMIN_ID, SECTIONS
+
+MENU_BUTTONS = [
+    ("clubs", "🎨 Кружки", "clubs"),
+    ("masterclasses", "🧩 Мастер-классы", "masters"),
+    ("packages", "🎉 Пакетные туры", "packages"),
+    ("support", "✉ Написать в поддержку", "support"),
+]
+
+UNSUBSCRIBE_KB = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(
+            text="ℹ Управление уведомлениями",
+            callback_data="manage_notifications"
+        )]
+    ]
+)
+
+
+def main_menu(user_id):
+    buttons = [
+        [InlineKeyboardButton(text=text, callback_data=data)]
+        for section, text, data in MENU_BUTTONS
+        if section in SECTIONS
+    ]
+    if user_id == ADMIN_ID and "admin" in SECTIONS:
+        buttons.append([InlineKeyboardButton(text="⚙ Админ панель", callback_data="admin")])
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+async def remove_reply_keyboard(bot, chat_id):
+    # reply-клавиатуру убирает только новое сообщение; служебное сразу удаляем
+    sent = await bot.send_message(chat_id, "⌛", reply_markup=ReplyKeyboardRemove())
+    await bot.delete_message(chat_id, sent.message_id)
+
+
+def profile_link(user):
+    return (
+        f'<a href="https://t.me/{user.username}">@{user.username}</a>'
+        if user.username else f'<a href="tg://user?id={user.id}">Профиль</a>'
+    )
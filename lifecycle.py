@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+# сколько ждать незавершённые хендлеры и рассылки при остановке
+DRAIN_TIMEOUT = 20
+
+
+async def _call(step):
+    result = step()
+    if inspect.isawaitable(result):
+        await result
+
+
+class Lifecycle:
+    # Запуск: прогрев кэшей → фоновые задачи → приём апдейтов.
+    # Остановка (aiogram уже прекратил polling по SIGTERM/SIGINT):
+    # ждём хендлеры → чекпоинт рассылок → очередь исходящих →
+    # фоновые задачи → сброс хранилищ → закрытие HTTP-сессии.
+
+    def __init__(self, bot, dispatcher, outbox, drain_timeout=DRAIN_TIMEOUT):
+        self.bot = bot
+        self.outbox = outbox
+        self.drain_timeout = drain_timeout
+
+        self.startup_steps = []
+        self.shutdown_steps = []
+        self.services = []
+        self.tasks = []
+        self.jobs = {}
+
+        self.accepting = False
+        self.in_flight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+        dispatcher.update.outer_middleware(self.track_update)
+        dispatcher.startup.register(self.startup)
+        dispatcher.shutdown.register(self.shutdown)
+
+    # ---------- Регистрация ----------
+
+    def on_startup(self, step):
+        self.startup_steps.append(step)
+        return step
+
+    def on_shutdown(self, step):
+        self.shutdown_steps.append(step)
+        return step
+
+    def service(self, factory):
+        # factory() -> корутина, работающая до отмены
+        self.services.append(factory)
+        return factory
+
+    def start_job(self, job, coro):
+        # job.stop() должен остановить работу с сохранением прогресса
+        task = asyncio.create_task(coro)
+        self.jobs[task] = job
+        task.add_done_callback(lambda t: self.jobs.pop(t, None))
+        return task
+
+    # ---------- Учёт апдейтов ----------
+
+    async def track_update(self, handler, event, data):
+        if not self.accepting:
+            logger.info("Апдейт %s пропущен: бот останавливается", event.update_id)
+            return None
+
+        self.in_flight += 1
+        self.idle.clear()
+        try:
+            return await handler(event, data)
+        finally:
+            self.in_flight -= 1
+            if not self.in_flight:
+                self.idle.set()
+
+    # ---------- Запуск / остановка ----------
+
+    async def startup(self):
+        for step in self.startup_steps:
+            await _call(step)
+        self.tasks = [asyncio.create_task(factory()) for factory in self.services]
+        self.tasks.append(asyncio.create_task(self.outbox.run()))
+        self.accepting = True
+        logger.info("Бот готов принимать апдейты")
+
+    async def shutdown(self):
+        self.accepting = False
+
+        try:
+            await asyncio.wait_for(self.idle.wait(), self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не дождались хендлеров: %s", self.in_flight)
+
+        for job in list(self.jobs.values()):
+            job.stop()
+        if self.jobs:
+            await asyncio.wait(list(self.jobs), timeout=self.drain_timeout)
+
+        await self.outbox.drain(self.drain_timeout)
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        for step in self.shutdown_steps:
+            try:
+                await _call(step)
+            except Exception:
+                logger.exception("Ошибка при остановке: %s", step)
+
+        await self.bot.session.close()
+        logger.info("Бот остановлен")
@@ -0,0 +1,159 @@
+import json
+import os
+
+from repository import new_master_id
+from tables import add_error, cell, error_lines, iter_rows, map_columns
+
+# заголовок столбца (в нижнем регистре) → поле мастер-класса
+HEADERS = {
+    "название": "title",
+    "title": "title",
+    "описание": "description",
+    "description": "description",
+    "дата": "date",
+    "дата и время": "date",
+    "date": "date",
+    "стоимость": "price",
+    "цена": "price",
+    "price": "price",
+    "педагог": "teacher",
+    "teacher": "teacher",
+    "ссылка": "link",
+    "link": "link",
+    "постер": "poster",
+    "poster": "poster",
+    "места": "capacity",
+    "количество мест": "capacity",
+    "capacity": "capacity",
+}
+
+REQUIRED = ("title", "date", "price", "link")
+FIELD_NAMES = {"title": "название", "date": "дата", "price": "стоимость", "link": "ссылка"}
+
+
+# ================= ПРОВЕРКА =================
+
+def parse_price(text):
+    text = text.lower().replace("₽", "").replace("руб.", "").replace("руб", "").replace(" ", "")
+    if text == "бесплатно":
+        return "0"
+    return text if text.isdigit() else None
+
+
+def validate(row, columns, media_dir):
+    # -> (мастер-класс, None) или (None, причина)
+    values = {field: cell(row[i]) if i < len(row) else "" for field, i in columns.items()}
+
+    missing = [FIELD_NAMES[f] for f in REQUIRED if not values.get(f)]
+    if missing:
+        return None, "не заполнено: " + ", ".join(missing)
+
+    price = parse_price(values["price"])
+    if price is None:
+        return None, f"неверная стоимость «{values['price']}»"
+
+    if not values["link"].startswith(("http://", "https://")):
+        return None, f"неверная ссылка «{values['link']}»"
+
+    capacity = values.get("capacity") or "0"
+    if not capacity.isdigit():
+        return None, f"неверное количество мест «{capacity}»"
+
+    master = {
+        "id": new_master_id(),
+        "title": values["title"],
+        "description": values.get("description", ""),
+        "date": values["date"],
+        "price": price,
+        "teacher": values.get("teacher", ""),
+        "link": values["link"],
+        "capacity": int(capacity),
+        "media": [],
+    }
+
+    poster = values.get("poster")
+    if poster:
+        if not os.path.isfile(os.path.join(media_dir, poster)):
+            return None, f"файл постера не найден: {poster}"
+        master["media"].append({"kind": "photo", "source": poster, "caption": ""})
+
+    return master, None
+
+
+# ================= ИМПОРТ =================
+
+def import_masterclasses(path, filename, master_file, media_dir="media"):
+    # Строки читаются и проверяются по одной и сразу дописываются во
+    # временный файл; master_file заменяется одним os.replace в конце,
+    # так что импорт либо применяется целиком, либо не применяется вовсе.
+    report = {"added": 0, "skipped": 0, "errors": [], "error_count": 0}
+
+    existing = []
+    if os.path.exists(master_file):
+        with open(master_file, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    known = {(m["title"], m["date"]) for m in existing}
+
+    rows = iter_rows(path, filename)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("Файл пуст")
+
+    columns = map_columns(header, HEADERS)
+    missing = [FIELD_NAMES[f] for f in REQUIRED if f not in columns]
+    if missing:
+        raise ValueError("Нет столбцов: " + ", ".join(missing))
+
+    tmp = f"{master_file}.import"
+    try:
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write("[")
+            first = True
+
+            def write(entry):
+                nonlocal first
+                body = json.dumps(entry, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+                out.write(("\n    " if first else ",\n    ") + body)
+                first = False
+
+            for entry in existing:
+                write(entry)
+            del existing
+
+            for line_no, row in enumerate(rows, start=2):
+                if not any(cell(v) for v in row):
+                    continue
+
+                master, error = validate(row, columns, media_dir)
+                if error:
+                    add_error(report, f"Строка {line_no}: {error}")
+                    continue
+
+                if (master["title"], master["date"]) in known:
+                    report["skipped"] += 1
+                    continue
+
+                write(master)
+                known.add((master["title"], master["date"]))
+                report["added"] += 1
+
+            out.write("\n]" if not first else "]")
+
+        if report["added"]:
+            os.replace(tmp, master_file)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return report
+
+
+def format_report(report):
+    lines = [
+        "📥 Импорт мастер-классов завершён\n",
+        f"✅ Добавлено: {report['added']}",
+        f"↩ Пропущено (уже есть): {report['skipped']}",
+        f"⚠ С ошибками: {report['error_count']}",
+    ]
+    lines.extend(error_lines(report))
+    return "\n".join(lines)
@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+import json
+import os
+
+from aiogram.types import (
+    FSInputFile,
+    InputMediaPhoto,
+    InputMediaVideo,
+    InputMediaDocument,
+    InputMediaAnimation,
+    Message
+)
+
+MEDIA_CACHE_FILE = "media_cache.json"
+# локальные файлы (постеры из импорта и т.п.) ищутся относительно этой папки
+MEDIA_DIR = "media"
+
+SEND_METHODS = {
+    "photo": "send_photo",
+    "video": "send_video",
+    "document": "send_document",
+    "animation": "send_animation",
+}
+
+INPUT_MEDIA = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "document": InputMediaDocument,
+    "animation": InputMediaAnimation,
+}
+
+
+def message_media(message):
+    # -> {"kind", "source", "caption"} для вложения из сообщения или None
+    if message.photo:
+        kind, source = "photo", message.photo[-1].file_id
+    elif message.video:
+        kind, source = "video", message.video.file_id
+    elif message.animation:
+        kind, source = "animation", message.animation.file_id
+    elif message.document:
+        kind, source = "document", message.document.file_id
+    else:
+        return None
+    return {"kind": kind, "source": source, "caption": message.caption or ""}
+
+
+def sent_file_id(message, kind):
+    if kind == "photo":
+        return message.photo[-1].file_id
+    return getattr(message, kind).file_id
+
+
+# ================= FILE_ID CACHE =================
+
+class MediaCache:
+    # Локальный файл загружается в Telegram один раз; дальше по sha256
+    # содержимого берётся сохранённый file_id. Источник, который не является
+    # локальным файлом, считается готовым file_id и отправляется как есть.
+
+    def __init__(self, path=MEDIA_CACHE_FILE, media_dir=MEDIA_DIR):
+        self.path = path
+        self.media_dir = media_dir
+        self.file_ids = {}
+        self.digests = {}
+        self.locks = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.file_ids = json.load(f)
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.file_ids, f)
+        os.replace(tmp, self.path)
+
+    def local_path(self, source):
+        for candidate in (source, os.path.join(self.media_dir, source)):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def _digest(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self.digests.get(key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 16), b""):
+                    h.update(chunk)
+            digest = self.digests[key] = h.hexdigest()
+        return digest
+
+    async def send(self, bot, chat_id, kind, source, **kwargs):
+        method = getattr(bot, SEND_METHODS[kind])
+        path = self.local_path(source)
+        if path is None:
+            return await method(chat_id, source, **kwargs)
+
+        digest = await asyncio.to_thread(self._digest, path)
+        async with self.locks.setdefault(digest, asyncio.Lock()):
+            file_id = self.file_ids.get(digest)
+            if file_id is not None:
+                return await method(chat_id, file_id, **kwargs)
+
+            message = await method(chat_id, FSInputFile(path), **kwargs)
+            self.file_ids[digest] = sent_file_id(message, kind)
+            await asyncio.to_thread(self.save)
+            return message
+
+    async def edit(self, bot, chat_id, message_id, kind, source, caption=None, reply_markup=None):
+        # замена вложения в уже отправленном сообщении (экран с постером)
+        def edit_with(media):
+            return bot.edit_message_media(
+                INPUT_MEDIA[kind](media=media, caption=caption),
+                chat_id=chat_id, message_id=message_id, reply_markup=reply_markup
+            )
+
+        path = self.local_path(source)
+        if path is None:
+            return await edit_with(source)
+
+        digest = await asyncio.to_thread(self._digest, path)
+        async with self.locks.setdefault(digest, asyncio.Lock()):
+            file_id = self.file_ids.get(digest)
+            if file_id is not None:
+                return await edit_with(file_id)
+
+            message = await edit_with(FSInputFile(path))
+            if isinstance(message, Message):
+                self.file_ids[digest] = sent_file_id(message, kind)
+                await asyncio.to_thread(self.save)
+            return message
+
+    async def send_group(self, bot, chat_id, items):
+        # items: [{"kind", "source", "caption"}]; загружаются только новые файлы
+        digests = []
+        media = []
+        for item in items:
+            path = self.local_path(item["source"])
+            digest = await asyncio.to_thread(self._digest, path) if path else None
+            if digest is None:
+                source = item["source"]
+            else:
+                source = self.file_ids.get(digest) or FSInputFile(path)
+            digests.append(digest if isinstance(source, FSInputFile) else None)
+            media.append(INPUT_MEDIA[item["kind"]](media=source, caption=item.get("caption") or None))
+
+        messages = await bot.send_media_group(chat_id, media)
+
+        uploaded = False
+        for digest, item, message in zip(digests, items, messages):
+            if digest is not None:
+                self.file_ids[digest] = sent_file_id(message, item["kind"])
+                uploaded = True
+        if uploaded:
+            await asyncio.to_thread(self.save)
+        return messages
+
+    async def send_content(self, bot, chat_id, text, items, reply_markup=None):
+        # текст, одно вложение с подписью или альбом
+        if not items:
+            return await bot.send_message(chat_id, text, reply_markup=reply_markup)
+        if len(items) == 1:
+            item = items[0]
+            return await self.send(
+                bot, chat_id, item["kind"], item["source"],
+                caption=item.get("caption") or None,
+                reply_markup=reply_markup
+            )
+        return await self.send_group(bot, chat_id, items)
@@ -0,0 +1,109 @@
+import logging
+from collections import OrderedDict
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, Message
+
+logger = logging.getLogger(__name__)
+
+# сколько чатов помнить; для забытых экран просто отредактируется без проверки
+SCREENS_LIMIT = 10_000
+
+
+def fingerprint(text, reply_markup=None):
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup else ""
+    return hash((text, markup))
+
+
+def screen_kind(message):
+    # текст можно заменить только текстом, вложение — только вложением
+    return "text" if message.text is not None else "media"
+
+
+class Navigator:
+    # Один «экран» на чат: переход по кнопке редактирует сообщение с этой
+    # кнопкой, ответ на ввод пользователя — последний запомненный экран.
+    # Если содержимое и клавиатура не изменились, запрос к API не
+    # отправляется вовсе. Новое сообщение — только когда редактировать
+    # нечего: текст вместо фото и наоборот, удалённое, слишком старое или
+    # забытое сообщение; заменённый экран того же чата при этом удаляется.
+
+    def __init__(self, limit=SCREENS_LIMIT):
+        self.limit = limit
+        # chat_id -> (message_id, fingerprint, "text" | "media")
+        self.screens = OrderedDict()
+
+    def remember(self, chat_id, message_id, print_, kind):
+        self.screens[chat_id] = (message_id, print_, kind)
+        self.screens.move_to_end(chat_id)
+        if len(self.screens) > self.limit:
+            self.screens.popitem(last=False)
+
+    async def show(self, event, text, reply_markup=None, **kwargs):
+        bot = event.bot
+
+        async def edit(chat_id, message_id):
+            await bot.edit_message_text(
+                text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup, **kwargs
+            )
+
+        async def send(chat_id):
+            return await bot.send_message(chat_id, text, reply_markup=reply_markup, **kwargs)
+
+        await self._show(event, fingerprint(text, reply_markup), "text", edit, send)
+
+    async def show_media(self, event, media, kind, source, caption=None, reply_markup=None):
+        # экран с вложением (постер и подпись); media — MediaCache с file_id
+        bot = event.bot
+
+        async def edit(chat_id, message_id):
+            await media.edit(bot, chat_id, message_id, kind, source, caption=caption, reply_markup=reply_markup)
+
+        async def send(chat_id):
+            return await media.send(bot, chat_id, kind, source, caption=caption, reply_markup=reply_markup)
+
+        print_ = fingerprint(f"{kind}:{source}:{caption}", reply_markup)
+        await self._show(event, print_, "media", edit, send)
+
+    async def _show(self, event, print_, kind, edit, send):
+        stale = None
+        if isinstance(event, CallbackQuery):
+            message = event.message
+            chat_id = message.chat.id if message else event.from_user.id
+            target = None
+            if isinstance(message, Message):
+                if screen_kind(message) == kind:
+                    target = message.message_id
+                else:
+                    stale = message.message_id
+        else:
+            chat_id = event.chat.id
+            screen = self.screens.get(chat_id)
+            target = None
+            if screen is not None:
+                if screen[2] == kind:
+                    target = screen[0]
+                else:
+                    stale = screen[0]
+
+        if target is not None:
+            if self.screens.get(chat_id, ())[:2] == (target, print_):
+                return
+            try:
+                await edit(chat_id, target)
+                self.remember(chat_id, target, print_, kind)
+                return
+            except TelegramBadRequest as e:
+                if "message is not modified" in e.message:
+                    self.remember(chat_id, target, print_, kind)
+                    return
+                logger.debug("Экран %s не отредактирован: %s", chat_id, e.message)
+
+        sent = await send(chat_id)
+        self.remember(chat_id, sent.message_id, print_, kind)
+
+        if stale is not None:
+            try:
+                await event.bot.delete_message(chat_id, stale)
+            except TelegramBadRequest as e:
+                logger.debug("Старый экран %s не удалён: %s", chat_id, e.message)
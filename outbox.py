@@ -0,0 +1,64 @@
+import asyncio
+import logging
+
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Telegram допускает около 30 сообщений в секунду на бота
+DEFAULT_RATE = 25
+
+
+class Outbox:
+    # Очередь исходящих сообщений с ограничением скорости. Хендлеры кладут
+    # сообщение и сразу продолжают работу; отправляет один фоновый воркер.
+
+    def __init__(self, bot, rate=DEFAULT_RATE, on_forbidden=None):
+        self.bot = bot
+        self.interval = 1 / rate
+        self.on_forbidden = on_forbidden
+        self.queue = asyncio.Queue()
+
+    def __len__(self):
+        return self.queue.qsize()
+
+    def submit(self, method, chat_id, *args, on_sent=None, **kwargs):
+        # on_sent(результат) вызывается после успешной отправки
+        self.queue.put_nowait((method, chat_id, args, kwargs, on_sent))
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.submit("send_message", chat_id, text, **kwargs)
+
+    async def _deliver(self, method, chat_id, args, kwargs, on_sent):
+        for _ in range(3):
+            try:
+                result = await getattr(self.bot, method)(chat_id, *args, **kwargs)
+            except TelegramRetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except TelegramForbiddenError:
+                if self.on_forbidden:
+                    self.on_forbidden(chat_id)
+                return
+            except Exception as e:
+                logger.warning("Не удалось отправить %s → %s: %s", method, chat_id, e)
+                return
+
+            if on_sent:
+                on_sent(result)
+            return
+
+    async def run(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                await self._deliver(*item)
+            finally:
+                self.queue.task_done()
+            await asyncio.sleep(self.interval)
+
+    async def drain(self, timeout):
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не отправлено сообщений из очереди: %s", len(self))
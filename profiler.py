@@ -0,0 +1,118 @@
+import asyncio
+import cProfile
+import heapq
+import io
+import logging
+import pstats
+import time
+
+from aiogram import BaseMiddleware
+
+# колбэк цикла событий дольше этого порога попадает в отчёт
+SLOW_CALLBACK_SECONDS = 0.1
+TOP_FUNCTIONS = 40
+TOP_HANDLERS = 20
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    # Регистрируется только на время профилирования
+
+    def __init__(self, limit=TOP_HANDLERS):
+        self.limit = limit
+        self.slowest = []  # min-heap (длительность, счётчик, описание)
+        self.calls = 0
+
+    async def __call__(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.calls += 1
+            handler_object = data.get("handler")
+            name = handler_object.callback.__name__ if handler_object else "?"
+            detail = getattr(event, "data", None) or getattr(event, "text", None) or ""
+            entry = (elapsed, self.calls, f"{name} [{str(detail)[:40]}]")
+            if len(self.slowest) < self.limit:
+                heapq.heappush(self.slowest, entry)
+            elif elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+
+class SlowCallbackCollector(logging.Handler):
+    # asyncio в debug-режиме пишет «Executing <Handle …> took N seconds»
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.records = []
+
+    def emit(self, record):
+        if "took" in record.getMessage():
+            self.records.append(record.getMessage())
+
+
+class Profiler:
+    # Пока профилирование выключено, ничего не зарегистрировано
+    # и накладных расходов нет.
+
+    def __init__(self):
+        self.running = False
+
+    async def run(self, dispatcher, seconds):
+        if self.running:
+            raise RuntimeError("Профилирование уже запущено")
+        self.running = True
+
+        loop = asyncio.get_running_loop()
+        old_debug = loop.get_debug()
+        old_slow = loop.slow_callback_duration
+        asyncio_logger = logging.getLogger("asyncio")
+
+        timing = HandlerTimingMiddleware()
+        slow = SlowCallbackCollector()
+        profile = cProfile.Profile()
+
+        dispatcher.message.middleware(timing)
+        dispatcher.callback_query.middleware(timing)
+        asyncio_logger.addHandler(slow)
+        loop.slow_callback_duration = SLOW_CALLBACK_SECONDS
+        loop.set_debug(True)
+
+        try:
+            profile.enable()
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            loop.set_debug(old_debug)
+            loop.slow_callback_duration = old_slow
+            asyncio_logger.removeHandler(slow)
+            dispatcher.message.middleware.unregister(timing)
+            dispatcher.callback_query.middleware.unregister(timing)
+            self.running = False
+
+        return self.report(seconds, profile, timing, slow)
+
+    @staticmethod
+    def report(seconds, profile, timing, slow):
+        out = io.StringIO()
+        out.write(f"Профилирование: {seconds} с, обработано событий: {timing.calls}\n\n")
+
+        out.write("=== Самые медленные обработчики ===\n")
+        for elapsed, _, name in sorted(timing.slowest, reverse=True):
+            out.write(f"{elapsed * 1000:10.1f} мс  {name}\n")
+        if not timing.slowest:
+            out.write("(нет вызовов)\n")
+
+        out.write(f"\n=== Колбэки цикла событий дольше {SLOW_CALLBACK_SECONDS * 1000:.0f} мс ===\n")
+        out.writelines(line + "\n" for line in slow.records[:TOP_HANDLERS])
+        if not slow.records:
+            out.write("(нет)\n")
+
+        out.write("\n=== Функции по суммарному времени ===\n")
+        stats = pstats.Stats(profile, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+
+        out.write("\n=== Функции по собственному времени ===\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(TOP_FUNCTIONS)
+
+        return out.getvalue()
@@ -0,0 +1,92 @@
+import json
+import os
+import uuid
+
+from tables import intern_text
+
+MASTER_FILE = "masterclasses.json"
+
+
+def new_master_id():
+    return uuid.uuid4().hex[:8]
+
+
+class Masterclass:
+    __slots__ = ("id", "title", "description", "date", "price", "teacher", "capacity", "link", "media")
+
+    def __init__(self, id, title, description="", date="", price="", teacher="",
+                 capacity=0, link="", media=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        # даты, цены и педагоги повторяются от мастер-класса к мастер-классу
+        self.date = intern_text(date)
+        self.price = intern_text(price)
+        self.teacher = intern_text(teacher)
+        self.capacity = int(capacity or 0)
+        self.link = link
+        self.media = media or []
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{field: data[field] for field in cls.__slots__ if field in data})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class MasterclassRepository:
+    # Мастер-классы держатся в памяти; файл читается при прогреве
+    # и перезаписывается только при изменениях из админки.
+
+    def __init__(self, path=MASTER_FILE):
+        self.path = path
+        self.masters = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            self.masters = []
+            self.save()
+            return self.masters
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        # у старых записей нет id — записи на места привязаны к нему
+        missing = any("id" not in m for m in data)
+        for m in data:
+            m.setdefault("id", new_master_id())
+        self.masters = [Masterclass.from_dict(m) for m in data]
+
+        if missing:
+            self.save()
+        return self.masters
+
+    def all(self):
+        if self.masters is None:
+            self.load()
+        return self.masters
+
+    def find(self, master_id):
+        return next((m for m in self.all() if m.id == master_id), None)
+
+    def save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump([m.to_dict() for m in self.masters], f, ensure_ascii=False, indent=4)
+        os.replace(tmp, self.path)
+
+    def add(self, data):
+        # data — словарь из формы админки
+        master = Masterclass.from_dict({"id": new_master_id(), **data})
+        self.all().append(master)
+        self.save()
+        return master
+
+    def remove(self, index):
+        masters = self.all()
+        if index >= len(masters):
+            return None
+        master = masters.pop(index)
+        self.save()
+        return master
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+
+from storage import AppendLog
+
+BOOKINGS_FILE = "bookings.jsonl"
+
+
+# ================= SEATS =================
+
+class SeatBook:
+    # Места на мастер-классах. Все изменения синхронные (без await),
+    # поэтому в asyncio они атомарны: проверка свободного места и запись
+    # не могут перемежаться с другой записью. На диск уходят только
+    # короткие операции в журнал bookings.jsonl.
+
+    def __init__(self, path=BOOKINGS_FILE):
+        self.log = AppendLog(path)
+        self.capacity = {}
+        self.booked = {}
+        self.waiting = {}
+
+    # ---------- Журнал ----------
+
+    def load(self):
+        for op in self.log.read():
+            self._apply(op)
+
+    def _apply(self, op):
+        mc = op["mc"]
+        booked = self.booked.setdefault(mc, OrderedDict())
+        waiting = self.waiting.setdefault(mc, OrderedDict())
+        uid = op.get("uid")
+
+        if op["op"] == "book":
+            booked[uid] = op["info"]
+        elif op["op"] == "wait":
+            waiting[uid] = op["info"]
+        elif op["op"] == "promote":
+            booked[uid] = waiting.pop(uid)
+        elif op["op"] == "cancel":
+            booked.pop(uid, None)
+            waiting.pop(uid, None)
+        elif op["op"] == "drop":
+            self.booked.pop(mc, None)
+            self.waiting.pop(mc, None)
+
+    def _record(self, op):
+        self._apply(op)
+        self.log.append(op)
+
+    def snapshot(self):
+        ops = []
+        for mc, booked in self.booked.items():
+            ops.extend({"op": "book", "mc": mc, "uid": uid, "info": info} for uid, info in booked.items())
+        for mc, waiting in self.waiting.items():
+            ops.extend({"op": "wait", "mc": mc, "uid": uid, "info": info} for uid, info in waiting.items())
+        return ops
+
+    async def compact(self):
+        await self.log.replace(self.snapshot)
+
+    # ---------- Места ----------
+
+    def sync(self, masters):
+        # вместимость берётся из masterclasses.json; 0 — без ограничений.
+        # -> [(mc, uid, info)] переведённых из листа ожидания
+        promoted = []
+        ids = set()
+        for m in masters:
+            ids.add(m.id)
+            self.capacity[m.id] = m.capacity
+            promoted.extend(self._promote(m.id))
+
+        for mc in list(self.capacity):
+            if mc not in ids:
+                self.drop(mc)
+        return promoted
+
+    def drop(self, mc):
+        self.capacity.pop(mc, None)
+        if mc in self.booked or mc in self.waiting:
+            self._record({"op": "drop", "mc": mc})
+
+    def seats_left(self, mc):
+        capacity = self.capacity.get(mc, 0)
+        if not capacity:
+            return None
+        return max(capacity - len(self.booked.get(mc, ())), 0)
+
+    def status(self, mc, uid):
+        # -> ("booked", None), ("waiting", позиция) или (None, None)
+        if uid in self.booked.get(mc, ()):
+            return "booked", None
+        waiting = self.waiting.get(mc, {})
+        if uid in waiting:
+            return "waiting", list(waiting).index(uid) + 1
+        return None, None
+
+    def book(self, mc, uid, info):
+        # -> ("booked" | "waiting" | "already", позиция в листе ожидания)
+        status, position = self.status(mc, uid)
+        if status is not None:
+            return "already", position
+
+        left = self.seats_left(mc)
+        if left is None or left > 0:
+            self._record({"op": "book", "mc": mc, "uid": uid, "info": info})
+            return "booked", None
+
+        self._record({"op": "wait", "mc": mc, "uid": uid, "info": info})
+        return "waiting", len(self.waiting[mc])
+
+    def cancel(self, mc, uid):
+        # -> [(mc, uid, info)] переведённых из листа ожидания
+        status, _ = self.status(mc, uid)
+        if status is None:
+            return []
+        self._record({"op": "cancel", "mc": mc, "uid": uid})
+        return self._promote(mc) if status == "booked" else []
+
+    def _promote(self, mc):
+        promoted = []
+        waiting = self.waiting.get(mc)
+        while waiting:
+            left = self.seats_left(mc)
+            if left is not None and left <= 0:
+                break
+            uid, info = next(iter(waiting.items()))
+            self._record({"op": "promote", "mc": mc, "uid": uid})
+            promoted.append((mc, uid, info))
+        return promoted
@@ -0,0 +1,204 @@
+import asyncio
+import html
+import logging
+from functools import cached_property
+
+from analytics import Analytics
+from broadcast import NewsJob, save_checkpoint
+from config import ADMIN_ID, ADMIN_IDS
+from keyboards import UNSUBSCRIBE_KB
+from lifecycle import Lifecycle
+from navigation import Navigator
+from outbox import Outbox
+from subscribers import SubscriberStore
+
+logger = logging.getLogger(__name__)
+
+# как часто проверять, не заменили ли joined_clubs.xlsx
+CATALOG_CHECK_INTERVAL = 60
+# сколько кружков перечислять в одном уведомлении
+CLUB_NEWS_LIMIT = 10
+
+
+class Services:
+    # Общие сервисы для всех роутеров; хендлеры получают их аргументом
+    # services (dp["services"]). Каталог, мастер-классы, записи и медиа
+    # создаются при первом обращении — в прогреве, если раздел включён,
+    # поэтому отключённые разделы не тянут ни модули, ни файлы.
+
+    def __init__(self, bot, dispatcher, sections):
+        self.bot = bot
+        self.sections = sections
+
+        self.subscribers = SubscriberStore()
+        self.outbox = Outbox(bot, on_forbidden=self.subscribers.remove)
+        self.lifecycle = Lifecycle(bot, dispatcher, self.outbox)
+        self.analytics = Analytics()
+        self.nav = Navigator()
+        self.catalog_diff = None
+        # фоновая проверка и /reload_catalog не должны перечитывать каталог одновременно
+        self.catalog_lock = asyncio.Lock()
+
+    def loaded(self, name):
+        return name in self.__dict__
+
+    def warm(self, *names):
+        for name in names:
+            getattr(self, name)
+
+    @cached_property
+    def catalog(self):
+        from catalog import Catalog
+
+        catalog = Catalog()
+        # файл могли заменить, пока бот был остановлен
+        self.catalog_diff = catalog.load()
+        return catalog
+
+    @cached_property
+    def masters(self):
+        from repository import MasterclassRepository
+
+        masters = MasterclassRepository()
+        masters.load()
+        return masters
+
+    @cached_property
+    def seats(self):
+        from seats import SeatBook
+
+        seats = SeatBook()
+        seats.load()
+        seats.sync(self.masters.all())
+        return seats
+
+    @cached_property
+    def media(self):
+        from media import MediaCache
+
+        media = MediaCache()
+        media.load()
+        return media
+
+    @cached_property
+    def tickets(self):
+        from tickets import TicketStore
+
+        tickets = TicketStore(ADMIN_IDS)
+        tickets.load()
+        return tickets
+
+    @cached_property
+    def profiler(self):
+        from profiler import Profiler
+
+        return Profiler()
+
+    # ---------- Каталог кружков ----------
+
+    async def reload_catalog(self):
+        # -> (дифф, сколько подписчиков уведомлено); (None, 0) — файл не менялся
+        async with self.catalog_lock:
+            if not self.catalog.modified():
+                return None, 0
+            diff = await asyncio.to_thread(self.catalog.reload)
+            if not diff:
+                return None, 0
+            return diff, await self.notify_clubs(diff)
+
+    async def watch_catalog(self, interval=CATALOG_CHECK_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                diff, notified = await self.reload_catalog()
+            except ValueError as e:
+                logger.warning("Каталог не обновлён: %s", e)
+                continue
+            except Exception:
+                logger.exception("Не удалось перечитать каталог")
+                continue
+            if diff:
+                logger.info(
+                    "Каталог обновлён: +%s ~%s -%s, ошибок в строках %s, уведомлено %s",
+                    len(diff["added"]), len(diff["changed"]), len(diff["removed"]),
+                    diff["report"]["error_count"], notified
+                )
+
+    async def notify_clubs(self, diff):
+        # новые и изменённые кружки — только тем, чей возраст и интересы подходят;
+        # каждому подписчику одно сообщение. Рассылка сохраняется в чекпоинт
+        # до отправки: состояние каталога уже записано, повторного диффа не будет
+        news = {}
+        for kind in ("added", "changed"):
+            for club in diff[kind]:
+                if club.min_age is None:
+                    continue
+                audience = self.subscribers.resolve(
+                    age=(club.min_age, club.max_age),
+                    interests=[club.direction]
+                )
+                for user_id in audience:
+                    news.setdefault(user_id, {"added": [], "changed": []})[kind].append(club)
+
+        if not news:
+            return 0
+        job = NewsJob(list(news), [club_news_text(clubs) for clubs in news.values()])
+        await save_checkpoint(job)
+        self.start_broadcast(job)
+        return len(news)
+
+    # ---------- Мастер-классы ----------
+
+    def notify_promoted(self, promoted):
+        for master_id, user_id, info in promoted:
+            m = self.masters.find(master_id)
+            title = m.title if m else master_id
+            self.outbox.send_message(
+                user_id,
+                f"🎉 Освободилось место на мастер-классе «{title}» — вы записаны!"
+            )
+            self.outbox.send_message(
+                ADMIN_ID,
+                f"⬆ Из листа ожидания записан(а) {info['name']}, {info['phone']}\n"
+                f"<b>{title}</b>\n"
+                f"TG ID: {user_id}"
+            )
+
+    # ---------- Рассылки ----------
+
+    def start_broadcast(self, job):
+        return self.lifecycle.start_job(job, self._run_broadcast(job))
+
+    async def _run_broadcast(self, job):
+        # при остановке бота job.run сохраняет чекпоинт и рассылка продолжится после запуска
+        media = self.media if job.kind == "broadcast" else None
+        if not await job.run(self.bot, media, self.subscribers, UNSUBSCRIBE_KB):
+            return
+
+        if job.admin_chat is None:
+            logger.info("Новости каталога разосланы: %s, удалено %s", job.success, job.removed)
+            return
+
+        await self.bot.send_message(
+            job.admin_chat,
+            f"📊 Рассылка завершена\n\n"
+            f"✅ Доставлено: {job.success}\n"
+            f"🚫 Удалено (заблокировали): {job.removed}"
+        )
+
+
+def club_news_text(clubs):
+    lines = []
+    for kind, title in (("added", "🆕 Новые кружки для вас"), ("changed", "✏ Обновления в кружках")):
+        if not clubs[kind]:
+            continue
+        lines.append(f"<b>{title}:</b>")
+        for club in clubs[kind][:CLUB_NEWS_LIMIT]:
+            lines.append(
+                f"• <a href='{club.link}'>{html.escape(str(club.name))}</a>, "
+                f"{club.age} — {html.escape(str(club.address))}"
+            )
+        if len(clubs[kind]) > CLUB_NEWS_LIMIT:
+            lines.append(f"…и ещё {len(clubs[kind]) - CLUB_NEWS_LIMIT}")
+        lines.append("")
+    return "\n".join(lines).strip()
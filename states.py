@@ -0,0 +1,37 @@
+from aiogram.fsm.state import State, StatesGroup
+
+
+class ClubForm(StatesGroup):
+    age = State()
+    address = State()
+    direction = State()
+    clubs = State()
+
+class PackageForm(StatesGroup):
+    people = State()
+    activities = State()
+    name = State()
+    phone = State()
+
+class MasterForm(StatesGroup):
+    title = State()
+    description = State()
+    date = State()
+    price = State()
+    teacher = State()
+    capacity = State()
+    link = State()
+    media = State()
+
+    enroll_name = State()
+    enroll_phone = State()
+    enroll_index = State()
+
+class ImportForm(StatesGroup):
+    file = State()
+
+class SupportForm(StatesGroup):
+    text = State()
+
+class BroadcastForm(StatesGroup):
+    content = State()
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+
+
+# ================= APPEND-ONLY LOG =================
+
+class AppendLog:
+    # Журнал в формате JSON Lines. Записи копятся в памяти и пишутся
+    # пачками в отдельном потоке, поэтому append() никогда не ждёт диска.
+
+    def __init__(self, path, flush_interval=1.0, batch_size=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = asyncio.Lock()
+        self.wakeup = asyncio.Event()
+
+    def append(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.wakeup.set()
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # недописанная строка после аварийного завершения
+                    continue
+
+    async def flush(self):
+        async with self.lock:
+            if not self.buffer:
+                return
+            batch, self.buffer = self.buffer, []
+            await asyncio.to_thread(self._write, batch)
+
+    def _write(self, batch):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in batch)
+
+    async def rewrite(self, keep):
+        # keep(record) -> bool; журнал переписывается потоково через tmp-файл
+        async with self.lock:
+            await asyncio.to_thread(self._rewrite, keep)
+
+    def _rewrite(self, keep):
+        if not os.path.exists(self.path):
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            for record in self.read():
+                if keep(record):
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+    async def replace(self, snapshot):
+        # snapshot() -> записи, заменяющие всю историю. Вызывается под
+        # блокировкой вместе с очисткой буфера, так что ничего не теряется.
+        async with self.lock:
+            records = snapshot()
+            self.buffer = []
+            await asyncio.to_thread(self._replace, records)
+
+    def _replace(self, records):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        os.replace(tmp, self.path)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
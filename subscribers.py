@@ -0,0 +1,316 @@
+import json
+import os
+import shlex
+import sys
+
+from storage import AppendLog
+from tables import MAX_AGE
+
+SUBSCRIBERS_FILE = "subscribers.jsonl"
+# прежний формат: весь список целиком, переносится в журнал при первом запуске
+USERS_FILE = "users.json"
+
+
+# ================= BITMAP =================
+
+class Bitmap:
+    # Плотная битовая карта: bytearray для O(1) set/clear,
+    # int для быстрых AND/OR по всей аудитории за один проход.
+
+    __slots__ = ("bits",)
+
+    def __init__(self):
+        self.bits = bytearray()
+
+    def add(self, slot):
+        byte = slot >> 3
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1))
+        self.bits[byte] |= 1 << (slot & 7)
+
+    def discard(self, slot):
+        byte = slot >> 3
+        if byte < len(self.bits):
+            self.bits[byte] &= ~(1 << (slot & 7)) & 0xFF
+
+    def to_int(self):
+        return int.from_bytes(self.bits, "little")
+
+
+def iter_slots(mask):
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+# ================= STORE =================
+
+class Subscriber:
+    # Подписчиков — сотни тысяч: __slots__, кортежи вместо списков,
+    # интернированные названия подразделений и интересов.
+
+    __slots__ = ("id", "age", "branches", "interests")
+
+    def __init__(self, id, age=None, branches=(), interests=()):
+        self.id = int(id)
+        self.age = age
+        self.branches = tuple(sorted(set(map(sys.intern, branches))))
+        self.interests = tuple(sorted(set(map(sys.intern, interests))))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data.get("age"), data.get("branches", ()), data.get("interests", ()))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "age": self.age,
+            "branches": list(self.branches),
+            "interests": list(self.interests),
+        }
+
+
+class SubscriberStore:
+    # Подписчики и битовые индексы по возрасту, подразделениям и интересам.
+    # Изменения пишутся короткими операциями в журнал subscribers.jsonl,
+    # а не перезаписью всего списка; при запуске журнал сжимается.
+
+    def __init__(self, path=SUBSCRIBERS_FILE, legacy_path=USERS_FILE):
+        self.log = AppendLog(path)
+        self.legacy_path = legacy_path
+        self.records = {}
+        self.slots = {}
+        self.slot_users = []
+        self.free_slots = []
+
+        self.by_age = {}
+        self.by_branch = {}
+        self.by_interest = {}
+        self.everyone = Bitmap()
+
+        self.load()
+
+    # ---------- Журнал ----------
+
+    def load(self):
+        if not os.path.exists(self.log.path) and os.path.exists(self.legacy_path):
+            self._migrate()
+            return
+        for op in self.log.read():
+            self._apply(op)
+
+    def _migrate(self):
+        with open(self.legacy_path, "r", encoding="utf-8") as f:
+            users = json.load(f)
+        for user in users:
+            # самый старый формат users.json — просто список ID
+            self._insert(Subscriber.from_dict(user) if isinstance(user, dict) else Subscriber(user))
+        # журнал создаётся сразу, иначе новые операции легли бы в пустой файл
+        self.log._replace(self.snapshot())
+
+    def _apply(self, op):
+        user_id = op["id"]
+        kind = op["op"]
+
+        if kind == "set":
+            self._delete(user_id)
+            self._insert(Subscriber.from_dict(op))
+            return
+        if kind == "remove":
+            self._delete(user_id)
+            return
+
+        if kind == "add":
+            if user_id not in self.records:
+                self._insert(Subscriber(user_id))
+            return
+
+        # подписчика создаёт только add (/start): отписавшийся не должен
+        # вернуться в рассылку, указав возраст или выбрав кружок
+        record = self.records.get(user_id)
+        if record is None:
+            return
+        if kind == "age":
+            self._set_age(record, op["age"])
+        elif kind == "tag":
+            self._tag(record, op["field"], op["value"])
+
+    def _record(self, op):
+        self._apply(op)
+        self.log.append(op)
+
+    def snapshot(self):
+        return [{"op": "set", **r.to_dict()} for r in self.records.values()]
+
+    async def compact(self):
+        await self.log.replace(self.snapshot)
+
+    # ---------- Индексы ----------
+
+    def _insert(self, record):
+        user_id = record.id
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_users[slot] = user_id
+        else:
+            slot = len(self.slot_users)
+            self.slot_users.append(user_id)
+
+        self.records[user_id] = record
+        self.slots[user_id] = slot
+        self.everyone.add(slot)
+        self._index(record, slot)
+
+    def _index(self, record, slot):
+        if record.age is not None:
+            self.by_age.setdefault(record.age, Bitmap()).add(slot)
+        for branch in record.branches:
+            self.by_branch.setdefault(branch, Bitmap()).add(slot)
+        for interest in record.interests:
+            self.by_interest.setdefault(interest, Bitmap()).add(slot)
+
+    def _unindex(self, record, slot):
+        if record.age is not None:
+            self.by_age[record.age].discard(slot)
+        for branch in record.branches:
+            self.by_branch[branch].discard(slot)
+        for interest in record.interests:
+            self.by_interest[interest].discard(slot)
+
+    # ---------- Подписчики ----------
+
+    def __contains__(self, user_id):
+        return user_id in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def ids(self):
+        return list(self.records)
+
+    def add(self, user_id):
+        if user_id not in self.records:
+            self._record({"op": "add", "id": user_id})
+
+    def remove(self, user_id):
+        if user_id in self.records:
+            self._record({"op": "remove", "id": user_id})
+
+    def set_age(self, user_id, age):
+        record = self.records.get(user_id)
+        if record is not None and record.age != age:
+            self._record({"op": "age", "id": user_id, "age": age})
+
+    def add_branch(self, user_id, branch):
+        self._add_tag(user_id, "branches", branch)
+
+    def add_interest(self, user_id, interest):
+        self._add_tag(user_id, "interests", interest)
+
+    def _add_tag(self, user_id, field, value):
+        record = self.records.get(user_id)
+        if record is not None and value not in getattr(record, field):
+            self._record({"op": "tag", "id": user_id, "field": field, "value": value})
+
+    def _delete(self, user_id):
+        record = self.records.pop(user_id, None)
+        if record is None:
+            return
+        slot = self.slots.pop(user_id)
+        self._unindex(record, slot)
+        self.everyone.discard(slot)
+        self.slot_users[slot] = None
+        self.free_slots.append(slot)
+
+    def _set_age(self, record, age):
+        slot = self.slots[record.id]
+        if record.age is not None:
+            self.by_age[record.age].discard(slot)
+        record.age = age
+        if age is not None:
+            self.by_age.setdefault(age, Bitmap()).add(slot)
+
+    def _tag(self, record, field, value):
+        values = getattr(record, field)
+        if value in values:
+            return
+        value = sys.intern(value)
+        setattr(record, field, tuple(sorted(values + (value,))))
+        index = self.by_branch if field == "branches" else self.by_interest
+        index.setdefault(value, Bitmap()).add(self.slots[record.id])
+
+    # ---------- Сегменты ----------
+
+    def resolve(self, age=None, branches=(), interests=()):
+        mask = self.everyone.to_int()
+
+        if age is not None:
+            low, high = age
+            age_mask = 0
+            for year in range(max(low, 0), min(high, MAX_AGE) + 1):
+                bitmap = self.by_age.get(year)
+                if bitmap is not None:
+                    age_mask |= bitmap.to_int()
+            mask &= age_mask
+
+        if branches:
+            mask &= self._match(self.by_branch, branches)
+        if interests:
+            mask &= self._match(self.by_interest, interests)
+
+        return [self.slot_users[slot] for slot in iter_slots(mask)]
+
+    @staticmethod
+    def _match(index, needles):
+        # значения фильтра сравниваются по подстроке: «щербинка» → «СП Щербинка»
+        needles = [n.lower() for n in needles]
+        mask = 0
+        for key, bitmap in index.items():
+            lowered = key.lower()
+            if any(n in lowered for n in needles):
+                mask |= bitmap.to_int()
+        return mask
+
+
+# ================= ФИЛЬТРЫ =================
+
+# age=7-10 branch=Щербинка interest="робот"
+# одинаковые ключи объединяются через ИЛИ, разные — через И
+def parse_segment(text):
+    segment = {"age": None, "branches": [], "interests": []}
+    if not text:
+        return segment
+
+    for token in shlex.split(text):
+        key, sep, value = token.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Неверный фильтр: {token}")
+
+        key = key.lower()
+        if key == "age":
+            low, _, high = value.partition("-")
+            if not low.isdigit() or (high and not high.isdigit()):
+                raise ValueError(f"Неверный возраст: {value}")
+            segment["age"] = (int(low), int(high or low))
+        elif key == "branch":
+            segment["branches"].append(value)
+        elif key == "interest":
+            segment["interests"].append(value)
+        else:
+            raise ValueError(f"Неизвестный фильтр: {key}")
+
+    return segment
+
+
+def describe_segment(segment):
+    parts = []
+    if segment["age"] is not None:
+        parts.append(f"возраст {segment['age'][0]}–{segment['age'][1]}")
+    if segment["branches"]:
+        parts.append("подразделение: " + " / ".join(segment["branches"]))
+    if segment["interests"]:
+        parts.append("интересы: " + " / ".join(segment["interests"]))
+    return ", ".join(parts) or "все пользователи"
@@ -0,0 +1,100 @@
+import codecs
+import csv
+import sys
+import zipfile
+
+# «12+» и т.п. — верхняя граница возраста
+MAX_AGE = 99
+# сколько ошибок показывать в отчёте импорта; остальные только считаются
+MAX_REPORTED_ERRORS = 20
+
+
+# ================= ЧТЕНИЕ ТАБЛИЦ =================
+
+# Общие потоковые читатели XLSX/CSV: строки отдаются по одной,
+# файл целиком в память не загружается.
+
+def iter_xlsx(path):
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    # .xls под видом .xlsx, битый архив — ошибка данных, а не кода
+    try:
+        wb = load_workbook(path, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError) as e:
+        raise ValueError("Не удалось открыть файл как XLSX") from e
+    try:
+        yield from wb.active.iter_rows(values_only=True)
+    except (zipfile.BadZipFile, KeyError, SyntaxError) as e:
+        raise ValueError("Файл XLSX повреждён") from e
+    finally:
+        wb.close()
+
+
+def iter_csv(path):
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    try:
+        # final=False: обрезанный на границе 4096 байт символ — не ошибка
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "cp1251"
+
+    with open(path, "r", encoding=encoding, newline="") as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(4096), delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        try:
+            yield from csv.reader(f, dialect)
+        except csv.Error as e:
+            raise ValueError(f"Не удалось прочитать CSV: {e}") from e
+
+
+def iter_rows(path, filename=None):
+    if (filename or path).lower().endswith(".csv"):
+        return iter_csv(path)
+    return iter_xlsx(path)
+
+
+def cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def intern_text(value):
+    # повторяющиеся строки из таблиц и JSON хранятся в одном экземпляре
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def map_columns(header, headers):
+    # -> {поле: индекс столбца}; заголовки сравниваются без учёта регистра
+    columns = {}
+    for i, name in enumerate(header):
+        field = headers.get(" ".join(cell(name).lower().split()))
+        if field and field not in columns:
+            columns[field] = i
+    return columns
+
+
+# ================= ОТЧЁТ ОБ ОШИБКАХ =================
+
+def add_error(report, message):
+    report["error_count"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append(message)
+
+
+def error_lines(report):
+    if not report["errors"]:
+        return []
+    lines = ["", *report["errors"]]
+    hidden = report["error_count"] - len(report["errors"])
+    if hidden:
+        lines.append(f"… и ещё {hidden}")
+    return lines
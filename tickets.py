@@ -0,0 +1,167 @@
+import dbm
+import time
+from collections import OrderedDict
+
+from storage import AppendLog
+
+TICKETS_FILE = "tickets.jsonl"
+# сообщение в чате → обращение; ключ-значение на диске, в памяти только кэш
+LINKS_FILE = "ticket_links"
+LINK_CACHE_SIZE = 2000
+
+OPEN = "open"
+CLOSED = "closed"
+
+
+# ================= TICKETS =================
+
+class TicketStore:
+    # Обращения в поддержку. Журнал tickets.jsonl переигрывается при
+    # запуске в индексы по пользователю, статусу и администратору.
+    # Каждое пересланное сообщение (у админа или у пользователя) связано
+    # с обращением: ответ на него находится по ключу (chat_id, message_id)
+    # в LRU-кэше, а при промахе — в dbm-файле, без перебора истории.
+
+    def __init__(self, admins, path=TICKETS_FILE, links_path=LINKS_FILE, cache_size=LINK_CACHE_SIZE):
+        self.admins = tuple(admins)
+        self.log = AppendLog(path)
+        self.links_path = links_path
+        self.links = None
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+        self.tickets = {}
+        self.by_user = {}
+        self.by_status = {OPEN: {}, CLOSED: {}}
+        self.by_admin = {}
+        self.next_id = 1
+
+    # ---------- Журнал ----------
+
+    def load(self):
+        for op in self.log.read():
+            self._apply(op)
+        self.links = dbm.open(self.links_path, "c")
+
+        # администратора убрали из списка — его обращения переходят другим
+        for ticket_id in list(self.by_status[OPEN]):
+            if self.tickets[ticket_id]["admin"] not in self.admins:
+                self._record({"op": "assign", "id": ticket_id, "admin": self.least_loaded()})
+
+    def close_links(self):
+        if self.links is not None:
+            self.links.close()
+            self.links = None
+
+    def _apply(self, op):
+        ticket_id = op["id"]
+
+        if op["op"] == "open":
+            ticket = {
+                "id": ticket_id, "uid": op["uid"], "admin": op["admin"],
+                "status": OPEN, "opened": op["ts"], "messages": []
+            }
+            self.tickets[ticket_id] = ticket
+            self.by_user.setdefault(op["uid"], []).append(ticket_id)
+            self.by_status[OPEN][ticket_id] = None
+            self.by_admin.setdefault(op["admin"], {})[ticket_id] = None
+            self.next_id = max(self.next_id, ticket_id + 1)
+            return
+
+        ticket = self.tickets[ticket_id]
+        if op["op"] == "msg":
+            ticket["messages"].append({"from": op["from"], "text": op["text"], "ts": op["ts"]})
+        elif op["op"] == "assign":
+            self.by_admin.get(ticket["admin"], {}).pop(ticket_id, None)
+            ticket["admin"] = op["admin"]
+            self.by_admin.setdefault(op["admin"], {})[ticket_id] = None
+        elif op["op"] == "close":
+            ticket["status"] = CLOSED
+            self.by_status[OPEN].pop(ticket_id, None)
+            self.by_status[CLOSED][ticket_id] = None
+            self.by_admin.get(ticket["admin"], {}).pop(ticket_id, None)
+
+    def _record(self, op):
+        self._apply(op)
+        self.log.append(op)
+
+    def snapshot(self):
+        ops = []
+        for ticket in self.tickets.values():
+            ops.append({
+                "op": "open", "id": ticket["id"], "uid": ticket["uid"],
+                "admin": ticket["admin"], "ts": ticket["opened"]
+            })
+            ops.extend({"op": "msg", "id": ticket["id"], **m} for m in ticket["messages"])
+            if ticket["status"] == CLOSED:
+                ops.append({"op": "close", "id": ticket["id"]})
+        return ops
+
+    async def compact(self):
+        await self.log.replace(self.snapshot)
+
+    # ---------- Обращения ----------
+
+    def least_loaded(self):
+        return min(self.admins, key=lambda admin: len(self.by_admin.get(admin, ())))
+
+    def current(self, uid):
+        ids = self.by_user.get(uid)
+        if ids and self.tickets[ids[-1]]["status"] == OPEN:
+            return self.tickets[ids[-1]]
+        return None
+
+    def open_ticket(self, uid):
+        # -> (обращение, создано ли новое); у пользователя одно открытое обращение
+        ticket = self.current(uid)
+        if ticket is not None:
+            return ticket, False
+
+        ticket_id = self.next_id
+        self._record({
+            "op": "open", "id": ticket_id, "uid": uid,
+            "admin": self.least_loaded(), "ts": int(time.time())
+        })
+        return self.tickets[ticket_id], True
+
+    def add_message(self, ticket, sender, text):
+        self._record({"op": "msg", "id": ticket["id"], "from": sender, "text": text, "ts": int(time.time())})
+
+    def close(self, ticket_id):
+        ticket = self.tickets.get(ticket_id)
+        if ticket is None or ticket["status"] != OPEN:
+            return None
+        self._record({"op": "close", "id": ticket_id})
+        return ticket
+
+    def assigned(self, admin):
+        return [self.tickets[i] for i in self.by_admin.get(admin, ())]
+
+    def history(self, uid):
+        return [self.tickets[i] for i in self.by_user.get(uid, ())]
+
+    # ---------- Маршрутизация ответов ----------
+
+    def link(self, chat_id, message_id, ticket_id):
+        key = f"{chat_id}:{message_id}"
+        self.links[key] = str(ticket_id)
+        self._cache(key, ticket_id)
+
+    def route(self, chat_id, message_id):
+        key = f"{chat_id}:{message_id}"
+        ticket_id = self.cache.get(key)
+        if ticket_id is not None:
+            self.cache.move_to_end(key)
+        else:
+            value = self.links.get(key)
+            if value is None:
+                return None
+            ticket_id = int(value)
+            self._cache(key, ticket_id)
+        return self.tickets.get(ticket_id)
+
+    def _cache(self, key, ticket_id):
+        self.cache[key] = ticket_id
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)